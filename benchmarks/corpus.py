@@ -0,0 +1,209 @@
+"""Generate a synthetic image library for benchmarks.
+
+Usage:
+    python -m benchmarks.corpus /tmp/corpus --count 2000 --size 1024x768 \
+        --formats jpg=0.7,png=0.2,webp=0.1 --duplicates 0.1
+
+Images are random shapes on a gradient, so they decode and compress like
+photos rather than flat colour. A share of them are near-duplicates of an
+earlier image (rescaled, re-encoded and slightly brightened), blurred or
+noisy. The same arguments and seed always give the same files.
+``corpus.json`` in the folder records the parameters and, per image, its
+duplicate group and whether it was blurred or made noisy.
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+MANIFEST_FILE = "corpus.json"
+DEFAULT_FORMATS = {"jpg": 0.7, "png": 0.2, "webp": 0.1}
+SAVE_FORMATS = {"jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_formats(text):
+    """``"jpg=0.7,png=0.3"`` to ``{"jpg": 0.7, "png": 0.3}``"""
+    formats = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip().lower()
+        if name not in SAVE_FORMATS:
+            raise ValueError(f"Unsupported format: {name}")
+        formats[name] = float(weight or 1)
+    return formats
+
+
+def draw_image(rng, size):
+    """A gradient background with random ellipses and rectangles"""
+    width, height = size
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    start = np.array([rng.randrange(256) for _ in range(3)], dtype=np.float32)
+    end = np.array([rng.randrange(256) for _ in range(3)], dtype=np.float32)
+    mix = ((x + y) / 2)[..., None]
+    background = (start * (1 - mix) + end * mix).astype(np.uint8)
+    image = Image.fromarray(background, "RGB")
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(8, 24)):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1 = x0 + rng.randint(width // 20, width // 3)
+        y1 = y0 + rng.randint(height // 20, height // 3)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=colour)
+        else:
+            draw.rectangle((x0, y0, x1, y1), fill=colour)
+    return image
+
+
+def make_duplicate(rng, image):
+    """A near-duplicate: slightly rescaled and brightened"""
+    width, height = image.size
+    factor = rng.uniform(0.85, 1.0)
+    copy = image.resize((int(width * factor), int(height * factor)), Image.BILINEAR)
+    return ImageEnhance.Brightness(copy).enhance(rng.uniform(0.95, 1.05))
+
+
+def add_noise(rng, image, sigma=40):
+    pixels = np.asarray(image, dtype=np.float32)
+    noise = np.random.default_rng(rng.randrange(2**32)).normal(0, sigma, pixels.shape)
+    return Image.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8), "RGB")
+
+
+def generate_corpus(
+    folder,
+    count=1000,
+    size=(1024, 768),
+    formats=None,
+    duplicate_rate=0.1,
+    blur_rate=0.05,
+    noise_rate=0.05,
+    subfolders=10,
+    seed=0,
+):
+    """Write ``count`` images under ``folder`` and return the manifest"""
+    folder = Path(folder)
+    formats = formats or DEFAULT_FORMATS
+    rng = random.Random(seed)
+    names = list(formats)
+    weights = [formats[name] for name in names]
+
+    images = []
+    # Originals are redrawn from their seed rather than kept in memory
+    group_seeds = []
+    for i in range(count):
+        if group_seeds and rng.random() < duplicate_rate:
+            group = rng.randrange(len(group_seeds))
+            original = draw_image(random.Random(group_seeds[group]), size)
+            image = make_duplicate(rng, original)
+        else:
+            group = len(group_seeds)
+            group_seeds.append(rng.randrange(2**32))
+            image = draw_image(random.Random(group_seeds[group]), size)
+
+        blurred = rng.random() < blur_rate
+        noisy = not blurred and rng.random() < noise_rate
+        if blurred:
+            image = image.filter(ImageFilter.GaussianBlur(radius=8))
+        elif noisy:
+            image = add_noise(rng, image)
+
+        extension = rng.choices(names, weights)[0]
+        directory = folder / f"set_{i % subfolders:03d}" if subfolders else folder
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"image_{i:06d}.{extension}"
+        image.save(path, SAVE_FORMATS[extension], quality=rng.randint(80, 95))
+        images.append(
+            {
+                "path": str(path.relative_to(folder)),
+                "group": group,
+                "blurred": blurred,
+                "noisy": noisy,
+            }
+        )
+
+    manifest = {
+        "count": count,
+        "size": list(size),
+        "formats": formats,
+        "duplicate_rate": duplicate_rate,
+        "blur_rate": blur_rate,
+        "noise_rate": noise_rate,
+        "subfolders": subfolders,
+        "seed": seed,
+        "images": images,
+    }
+    with open(folder / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(folder):
+    """The manifest of a generated corpus, or None for any other folder"""
+    try:
+        with open(Path(folder) / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def add_arguments(parser):
+    parser.add_argument("--count", type=int, default=1000, help="Images to write")
+    parser.add_argument(
+        "--size", type=parse_size, default=(1024, 768), help="WIDTHxHEIGHT"
+    )
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=DEFAULT_FORMATS,
+        help="Format mix, e.g. jpg=0.7,png=0.2,webp=0.1",
+    )
+    parser.add_argument(
+        "--duplicates", type=float, default=0.1, help="Share of near-duplicates"
+    )
+    parser.add_argument("--blurry", type=float, default=0.05, help="Share blurred")
+    parser.add_argument("--noisy", type=float, default=0.05, help="Share made noisy")
+    parser.add_argument(
+        "--subfolders", type=int, default=10, help="Folders to spread images over"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def corpus_from_args(folder, args):
+    return generate_corpus(
+        folder,
+        count=args.count,
+        size=args.size,
+        formats=args.formats,
+        duplicate_rate=args.duplicates,
+        blur_rate=args.blurry,
+        noise_rate=args.noisy,
+        subfolders=args.subfolders,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", type=str, help="Folder to write the images to")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    manifest = corpus_from_args(args.folder, args)
+    groups = len({image["group"] for image in manifest["images"]})
+    print(f"Wrote {manifest['count']} images ({groups} distinct) to {args.folder}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
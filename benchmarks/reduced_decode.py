@@ -0,0 +1,61 @@
+"""Compare blur/noise metrics at reduced decode scales against full resolution.
+
+Usage:
+    python -m benchmarks.reduced_decode /path/to/images --limit 200
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from src.utils.file_ops import get_recursive_image_files
+from src.utils.quality import (
+    analyze_image_quality,
+    calibrate_blur_scale,
+    is_bad_quality,
+)
+
+
+def time_scale(image_paths, scale, blur_factor=1.0):
+    """Analyze every image at ``scale``; return (seconds, bad-image flags)"""
+    start = time.perf_counter()
+    flags = []
+    for image_path in image_paths:
+        scores = analyze_image_quality(image_path, scale)
+        if scores is not None:
+            scores = (scores[0] / blur_factor, scores[1])
+        flags.append(is_bad_quality(scores))
+    return time.perf_counter() - start, flags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", type=str, help="Path to image folder")
+    parser.add_argument("--limit", type=int, default=200, help="Images to test")
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[2, 4, 8], help="Scales to test"
+    )
+    args = parser.parse_args()
+
+    image_paths = get_recursive_image_files(Path(args.folder))[: args.limit]
+    if not image_paths:
+        print("No images found")
+        return 1
+
+    full_time, full_flags = time_scale(image_paths, 1)
+    print(f"{len(image_paths)} images, full resolution: {full_time:.2f}s")
+
+    for scale in args.scales:
+        factor = calibrate_blur_scale(image_paths, scale)
+        reduced_time, flags = time_scale(image_paths, scale, factor)
+        agreement = sum(a == b for a, b in zip(full_flags, flags)) / len(flags)
+        print(
+            f"1/{scale} scale: {reduced_time:.2f}s "
+            f"({full_time / reduced_time:.1f}x faster), "
+            f"calibration {factor:.2f}, agreement {agreement:.1%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+"""Measure how long the app takes to paint the Batch View.
+
+Usage:
+    python -m benchmarks.startup /path/to/images [--runs 5]
+
+Each run starts a fresh interpreter so imports are timed too. Reported per
+run: seconds until the main modules are imported, until the Batch View is
+first painted, and until its page of thumbnails has been decoded.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+START = time.perf_counter()
+
+
+def measure(folder):
+    """Start the window in this process and return the timings in seconds"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+
+    from src.ui.main_window import ImageManager
+
+    timings = {"imports": time.perf_counter() - START}
+    app = QApplication(sys.argv[:1])
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and "first_paint" not in timings:
+                timings["first_paint"] = time.perf_counter() - START
+            return False
+
+    window = ImageManager(folder)
+    paint_filter = FirstPaint()
+    window.batch_tab.installEventFilter(paint_filter)
+    window.show()
+
+    def check_thumbnails():
+        loader = window.batch_tab.thumbnail_loader
+        if "first_paint" in timings and not loader.pending:
+            timings["thumbnails"] = time.perf_counter() - START
+            window.close()
+            app.quit()
+
+    poll = QTimer()
+    poll.timeout.connect(check_thumbnails)
+    poll.start(5)
+    app.exec_()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", type=str, help="Path to image folder")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to time")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(measure(args.folder)))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", args.folder, "--single"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key in ("imports", "first_paint", "thumbnails"):
+        values = [run[key] for run in runs if key in run]
+        if values:
+            print(
+                f"{key:12s} median {statistics.median(values):.3f}s  "
+                f"min {min(values):.3f}s  max {max(values):.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Deterministic stand-in for the CLIP image encoder.
+
+``get_image_embedding`` has the same interface as
+``src.utils.image_processing.get_image_embedding``: an image path in, a
+512-dimensional float32 vector (or None if the image cannot be read) out.
+The vector is a fixed random projection of a small colour thumbnail, so it
+costs a decode and a matrix product, never changes between runs, and
+near-duplicate images still land close together.
+
+``stub_embeddings()`` swaps it in for CLIP inside
+``src.utils.image_processing``, so the embedding store, the similar-image
+scan and the ``index`` command can run offline without weights.
+"""
+
+import contextlib
+import logging
+
+import numpy as np
+from PIL import Image
+
+EMBEDDING_DIM = 512
+THUMBNAIL_SIDE = 16
+SEED = 0
+
+_projection = np.random.default_rng(SEED).standard_normal(
+    (THUMBNAIL_SIDE * THUMBNAIL_SIDE * 3, EMBEDDING_DIM)
+).astype(np.float32)
+
+
+def get_image_embedding(image_path):
+    try:
+        with Image.open(image_path) as image:
+            image.draft("RGB", (THUMBNAIL_SIDE * 4, THUMBNAIL_SIDE * 4))
+            image = image.convert("RGB").resize(
+                (THUMBNAIL_SIDE, THUMBNAIL_SIDE), Image.BILINEAR
+            )
+        pixels = np.asarray(image, dtype=np.float32).ravel() / 255.0
+        return (pixels - pixels.mean()) @ _projection
+    except Exception as e:
+        logging.error(f"Error processing image {image_path}: {e}")
+        return None
+
+
+def iter_embedding_batches(image_paths, batch_size=32, num_workers=None):
+    """Same contract as ``image_processing.iter_embedding_batches``"""
+    image_paths = list(image_paths)
+    for i in range(0, len(image_paths), batch_size):
+        batch = image_paths[i : i + batch_size]
+        yield batch, [get_image_embedding(p) for p in batch]
+
+
+@contextlib.contextmanager
+def stub_embeddings():
+    """Route ``image_processing``'s CLIP calls to the stub while active"""
+    from src.utils import image_processing
+
+    saved = (
+        image_processing.get_image_embedding,
+        image_processing.iter_embedding_batches,
+    )
+    image_processing.get_image_embedding = get_image_embedding
+    image_processing.iter_embedding_batches = iter_embedding_batches
+    try:
+        yield
+    finally:
+        (
+            image_processing.get_image_embedding,
+            image_processing.iter_embedding_batches,
+        ) = saved
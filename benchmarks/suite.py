@@ -0,0 +1,370 @@
+"""Repeatable benchmarks for the scan and loading paths, written as JSON.
+
+Usage:
+    python -m benchmarks.suite /tmp/corpus --generate --count 2000
+    python -m benchmarks.suite /tmp/corpus --output run.json --compare base.json
+
+With ``--generate`` a synthetic corpus is written to the folder first (see
+``benchmarks.corpus``); any existing library works too. Embeddings come from
+the deterministic stub unless ``--backend clip`` is given, so runs are
+comparable offline. Caches are written to a temporary folder, never to the
+library's own ``.cache``.
+
+Each benchmark is run ``--repeat`` times; the JSON report holds every
+timing plus the environment and corpus it ran on.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.file_ops import get_recursive_image_files, scan_image_files
+from src.utils.catalog import Catalog
+from src.utils.embedding_store import EmbeddingStore
+from src.utils.similarity import normalize_embeddings, iter_similar_pairs
+from src.utils.grouping import group_edges
+from src.utils.thumbnails import ThumbnailCache
+from src.utils.scanners import SIMILARITY_THRESHOLD
+from src.utils.quality import BLUR_THRESHOLD, NOISE_THRESHOLD
+from src.utils.encoders import ENCODER_BACKENDS
+from src.utils import image_processing
+
+from . import corpus
+from .stub_embedder import stub_embeddings
+
+BENCHMARKS = ("walk", "quality", "embedding", "similarity", "catalog", "thumbnails")
+# Rows fetched per catalog page, as the result tabs do
+CATALOG_PAGE = 100
+
+
+def bench_walk(context):
+    start = time.perf_counter()
+    image_files = get_recursive_image_files(context["folder"])
+    seconds = time.perf_counter() - start
+    return seconds, {"images": len(image_files)}
+
+
+def bench_walk_parallel(context):
+    start = time.perf_counter()
+    image_files = get_recursive_image_files(context["folder"], num_workers=8)
+    seconds = time.perf_counter() - start
+    return seconds, {"images": len(image_files), "workers": 8}
+
+
+def bench_quality(context):
+    image_paths = context["sample"]
+    start = time.perf_counter()
+    blurry = sum(image_processing.is_blurry(p) for p in image_paths)
+    noisy = sum(image_processing.detect_noise(p) for p in image_paths)
+    seconds = time.perf_counter() - start
+    return seconds, {"images": len(image_paths), "blurry": blurry, "noisy": noisy}
+
+
+def bench_embedding(context):
+    """Cold fill of a fresh embedding store"""
+    store_dir = Path(context["scratch"]) / "embedding"
+    shutil.rmtree(store_dir, ignore_errors=True)
+    store_dir.mkdir()
+    store = EmbeddingStore(context["folder"], cache_dir=store_dir)
+    start = time.perf_counter()
+    encoded = image_processing.fill_embedding_store(context["sample"], store)
+    store.save()
+    seconds = time.perf_counter() - start
+    context["store_dir"] = store_dir
+    return seconds, {"images": len(context["sample"]), "encoded": encoded}
+
+
+def bench_similarity(context):
+    """Exact pair search and grouping over the stored embeddings"""
+    image_paths = context["sample"]
+    store = EmbeddingStore(context["folder"], cache_dir=context["store_dir"])
+    embeddings, indices = store.stack(image_paths)
+    start = time.perf_counter()
+    pairs = iter_similar_pairs(
+        normalize_embeddings(embeddings), context["threshold"]
+    )
+    groups = group_edges(len(indices), pairs)
+    seconds = time.perf_counter() - start
+    info = {"images": len(indices), "groups": len(groups)}
+    if context["manifest"] is not None:
+        sample = {str(p) for p in image_paths}
+        members = {}
+        for image in context["manifest"]["images"]:
+            if str(Path(context["folder"]) / image["path"]) in sample:
+                members.setdefault(image["group"], 0)
+                members[image["group"]] += 1
+        info["expected_groups"] = sum(1 for n in members.values() if n > 1)
+    return seconds, info
+
+
+def _page_through(fetch):
+    """Read every page the way the tabs do; returns the number of rows"""
+    rows = 0
+    while True:
+        page = fetch(limit=CATALOG_PAGE, offset=rows)
+        if not page:
+            return rows
+        rows += len(page)
+
+
+def bench_catalog(context):
+    """Cold sync, quality and group writes, paged reads, then a warm sync.
+
+    Scores and groups are synthetic, so only the catalog itself is timed.
+    """
+    catalog_dir = Path(context["scratch"]) / "catalog"
+    shutil.rmtree(catalog_dir, ignore_errors=True)
+    catalog_dir.mkdir()
+    files = context["files"]
+    image_files = list(files)
+    scores = {
+        p: (float(i * 37 % (4 * BLUR_THRESHOLD)), float(i * 11 % (2 * NOISE_THRESHOLD)))
+        for i, p in enumerate(image_files)
+    }
+    groups = [image_files[i : i + 3] for i in range(0, len(image_files) - 2, 10)]
+
+    catalog = Catalog(context["folder"], cache_dir=catalog_dir)
+    try:
+        start = time.perf_counter()
+        catalog.sync_files(image_files, files)
+        catalog.save_quality(scores)
+        catalog.save_similar_groups(groups)
+        bad = _page_through(
+            lambda limit, offset: catalog.bad_images(
+                BLUR_THRESHOLD, NOISE_THRESHOLD, limit, offset
+            )
+        )
+        grouped = _page_through(catalog.similar_groups)
+        seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        catalog.sync_files(image_files, files)
+        warm = time.perf_counter() - start
+    finally:
+        catalog.close()
+    return seconds, {
+        "files": len(image_files),
+        "bad_images": bad,
+        "groups": grouped,
+        "warm_sync_seconds": warm,
+    }
+
+
+def bench_thumbnails(context):
+    """Cold tile creation, then warm lookups of the same tiles"""
+    tiles_dir = Path(context["scratch"]) / "thumbnails"
+    shutil.rmtree(tiles_dir, ignore_errors=True)
+    tiles_dir.mkdir()
+    cache = ThumbnailCache(tiles_dir)
+    image_paths = context["sample"]
+
+    start = time.perf_counter()
+    created = sum(cache.get(p) is not None for p in image_paths)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for image_path in image_paths:
+        cache.get(image_path)
+    warm = time.perf_counter() - start
+
+    info = {"images": len(image_paths), "created": created, "warm_seconds": warm}
+    decode = qt_decode_seconds(context, tiles_dir)
+    if decode is not None:
+        info["qt_decode_seconds"] = decode
+    return cold, info
+
+
+def qt_decode_seconds(context, root_folder):
+    """Time the GUI's thumbnail decode from warm tiles, if PyQt5 is installed"""
+    try:
+        from PyQt5.QtGui import QGuiApplication
+        from src.ui.thumbnail_loader import load_thumbnail_image
+    except ImportError:
+        return None
+
+    if QGuiApplication.instance() is None:
+        context["qt_app"] = QGuiApplication(["benchmark", "-platform", "offscreen"])
+    start = time.perf_counter()
+    for image_path in context["sample"]:
+        load_thumbnail_image(image_path, root_folder)
+    return time.perf_counter() - start
+
+
+RUNNERS = {
+    "walk": [("walk", bench_walk), ("walk_parallel", bench_walk_parallel)],
+    "quality": [("quality", bench_quality)],
+    "embedding": [("embedding", bench_embedding)],
+    "similarity": [("similarity", bench_similarity)],
+    "catalog": [("catalog", bench_catalog)],
+    "thumbnails": [("thumbnails", bench_thumbnails)],
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(seconds):
+    return {
+        "median": statistics.median(seconds),
+        "min": min(seconds),
+        "max": max(seconds),
+    }
+
+
+def run_suite(folder, selected, repeat, limit, backend, threshold):
+    files = scan_image_files(folder)
+    manifest = corpus.load_manifest(folder)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="image-manager-bench-") as scratch:
+        context = {
+            "folder": Path(folder),
+            "files": files,
+            "sample": list(files)[:limit] if limit else list(files),
+            "manifest": manifest,
+            "scratch": scratch,
+            "store_dir": Path(scratch) / "embedding",
+            "threshold": threshold,
+        }
+        # Later benchmarks read the embeddings this one stores
+        if "embedding" not in selected and "similarity" in selected:
+            selected = ["embedding"] + list(selected)
+
+        for benchmark in BENCHMARKS:
+            if benchmark not in selected:
+                continue
+            for name, runner in RUNNERS[benchmark]:
+                seconds = []
+                info = {}
+                for _ in range(repeat):
+                    elapsed, info = runner(context)
+                    seconds.append(elapsed)
+                results[name] = {"seconds": seconds, **summarize(seconds), **info}
+                print(
+                    f"{name:14s} median {results[name]['median']:.3f}s  "
+                    f"min {results[name]['min']:.3f}s  max {results[name]['max']:.3f}s",
+                    file=sys.stderr,
+                )
+
+    corpus_info = None
+    if manifest is not None:
+        corpus_info = {k: v for k, v in manifest.items() if k != "images"}
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "folder": str(folder),
+        "images": len(files),
+        "sample": len(context["sample"]),
+        "repeat": repeat,
+        "backend": backend,
+        "corpus": corpus_info,
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Print each benchmark's median against a previous report's"""
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else 0
+        print(
+            f"{name:14s} {before['median']:.3f}s -> {result['median']:.3f}s "
+            f"({ratio:.2f}x)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", type=str, help="Path to image folder")
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=BENCHMARKS,
+        default=list(BENCHMARKS),
+        help="Benchmarks to run",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=500,
+        help="Images used by the per-image benchmarks (0 for all)",
+    )
+    parser.add_argument("--backend", choices=("stub", "clip"), default="stub")
+    parser.add_argument(
+        "--encoder",
+        choices=ENCODER_BACKENDS,
+        default="torch",
+        help="CLIP image encoder used with --backend clip",
+    )
+    parser.add_argument("--int8", action="store_true", help="Quantize the encoder")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument("--output", type=str, help="Write the JSON report here")
+    parser.add_argument("--compare", type=str, help="Previous JSON report")
+    parser.add_argument(
+        "--generate", action="store_true", help="Write a synthetic corpus first"
+    )
+    corpus.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.generate and corpus.load_manifest(args.folder) is None:
+        corpus.corpus_from_args(args.folder, args)
+
+    backend_name = args.backend
+    if args.backend == "clip":
+        image_processing.set_encoder_backend(args.encoder, args.int8)
+        if not image_processing.is_clip_available():
+            print("CLIP is not available, use --backend stub", file=sys.stderr)
+            return 1
+        encoder = image_processing.encoder
+        backend_name = f"clip-{encoder.name}{'-int8' if encoder.quantize else ''}"
+
+    backend = stub_embeddings() if args.backend == "stub" else contextlib.nullcontext()
+    with backend:
+        report = run_suite(
+            args.folder,
+            args.benchmarks,
+            args.repeat,
+            args.limit,
+            backend_name,
+            args.threshold,
+        )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,34 +1,10 @@
 import sys
-import os
-import cv2
-import torch
-import clip
-import numpy as np
-import imagehash
-from PIL import Image
 from pathlib import Path
-from PyQt5.QtWidgets import (
-    QApplication,
-    QLabel,
-    QPushButton,
-    QGridLayout,
-    QVBoxLayout,
-    QWidget,
-    QHBoxLayout,
-    QFrame,
-    QTabWidget,
-    QProgressDialog,
-    QScrollArea,
-)
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject
-from sklearn.cluster import KMeans
 import argparse
 import logging
-import json
-from datetime import datetime
 
-from src.ui.main_window import ImageManager
+# Subcommands that run headless, without importing PyQt5
+CLI_COMMANDS = ("scan-similar", "scan-blurry", "index", "validate-encoder")
 
 
 def setup_logging():
@@ -50,32 +26,84 @@ def setup_logging():
     logging.info("Logging initialized")
 
 
-def main():
+def warm_up(encoder="torch", int8=False):
+    """Import torch and load CLIP off the GUI thread"""
+    from src.utils.image_processing import set_encoder_backend, warm_up_model
+
+    set_encoder_backend(encoder, int8)
+    warm_up_model()
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in CLI_COMMANDS:
+        from src.cli import main as cli_main
+
+        return cli_main(argv)
+    return run_gui(argv)
+
+
+def run_gui(argv):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+
+    from src.ui.main_window import ImageManager
+    from src.ui.image_cache import image_cache
+    from src.utils.encoders import ENCODER_BACKENDS
+    from src.utils.thumbnails import DEFAULT_MAX_BYTES, set_thumbnail_cache_max_bytes
+
     setup_logging()
 
     parser = argparse.ArgumentParser(description="AI Image Management Tool")
     parser.add_argument(
         "--folder", type=str, required=True, help="Path to image folder"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--image-cache-mb",
+        type=int,
+        default=256,
+        help="Memory budget for decoded images shared by all tabs",
+    )
+    parser.add_argument(
+        "--thumbnail-cache-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Disk budget for thumbnail tiles under the folder's .cache",
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=ENCODER_BACKENDS,
+        default="torch",
+        help="Backend for the CLIP image encoder",
+    )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Quantize the torchscript or onnx encoder to int8",
+    )
+    parser.epilog = (
+        f"Headless scans: {', '.join(CLI_COMMANDS)} (see <command> --help)"
+    )
+    args = parser.parse_args(argv)
 
     logging.info("App Starting")
 
-    # Check if CUDA is available
-    logging.info(f"CUDA available: {torch.cuda.is_available()}")
-    if torch.cuda.is_available():
-        logging.info(f"CUDA device: {torch.cuda.get_device_name(0)}")
-
     # Validate folder
     image_folder = Path(args.folder)
     if not image_folder.exists():
         logging.error(f"Folder not found: {image_folder}")
         return 1
 
+    image_cache.set_max_bytes(args.image_cache_mb * 1024 * 1024)
+    set_thumbnail_cache_max_bytes(args.thumbnail_cache_mb * 1024 * 1024)
+
     # Create application
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + argv)
     window = ImageManager(image_folder)
     window.show()
+    # Load CLIP in the background once the window is up
+    QTimer.singleShot(0, lambda: warm_up(args.encoder, args.int8))
 
     return app.exec_()
 
@@ -0,0 +1,314 @@
+"""Headless ``image-manager`` subcommands.
+
+Runs the same scan engines as the GUI tabs and writes to the same
+``.cache`` folder, so a library scanned here opens with its results in
+place. Nothing in this module imports PyQt5.
+
+    image-manager scan-similar /path/to/images --threshold 0.9
+    image-manager scan-blurry /path/to/images --workers 8
+    image-manager index /path/to/images --thumbnails
+    image-manager validate-encoder /path/to/images --encoder onnx --int8
+"""
+
+import argparse
+import logging
+import signal
+import sys
+import time
+from pathlib import Path
+
+from .utils.file_ops import scan_image_files
+from .utils.encoders import ENCODER_BACKENDS
+from .utils.grouping import GROUPING_METHODS
+from .utils.image_processing import (
+    set_encoder_backend,
+    validate_encoder,
+    is_clip_available,
+    get_clip_status,
+)
+from .utils.metrics import metrics
+from .utils.thumbnails import DEFAULT_MAX_BYTES, set_thumbnail_cache_max_bytes
+from .utils.scanners import (
+    SIMILARITY_THRESHOLD,
+    scan_similar,
+    scan_blurry,
+    index_library,
+)
+
+# Progress lines are redrawn at most this often
+PROGRESS_INTERVAL = 0.5
+
+
+class CommandFailed(Exception):
+    """A command that could not produce a result; exits with status 1"""
+
+
+class ProgressReporter:
+    """Writes ``progress(done, total, message)`` updates to stderr.
+
+    On a terminal the line is redrawn in place; otherwise one line is
+    written per update, throttled so logs stay readable.
+    """
+
+    def __init__(self, stream=None, interval=PROGRESS_INTERVAL):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.interactive = self.stream.isatty()
+        self.last_time = 0
+        self.last_width = 0
+
+    def __call__(self, done, total, message):
+        now = time.monotonic()
+        finished = total and done >= total
+        if now - self.last_time < self.interval and not finished:
+            return
+        self.last_time = now
+
+        line = message.replace("\n", " - ")
+        if total:
+            line = f"[{100 * done / total:5.1f}%] {line}"
+        if self.interactive:
+            self.stream.write("\r" + line.ljust(self.last_width))
+            self.last_width = len(line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def finish(self):
+        if self.interactive and self.last_width:
+            self.stream.write("\n")
+            self.stream.flush()
+        self.last_width = 0
+
+
+class Interrupt:
+    """Turns the first Ctrl-C into a cancel request for the running scan"""
+
+    def __init__(self):
+        self.requested = False
+        self.previous = signal.signal(signal.SIGINT, self.on_signal)
+
+    def on_signal(self, signum, frame):
+        self.requested = True
+        # A second Ctrl-C stops immediately
+        signal.signal(signal.SIGINT, self.previous)
+        print("\nCancelling...", file=sys.stderr)
+
+    def __call__(self):
+        return self.requested
+
+    def restore(self):
+        signal.signal(signal.SIGINT, self.previous)
+
+
+def run_scan_similar(args, image_files, stats, progress, cancelled):
+    result = scan_similar(
+        args.folder,
+        image_files,
+        args.threshold,
+        search_mode=args.search,
+        grouping=args.grouping,
+        stats=stats,
+        progress=progress,
+        cancelled=cancelled,
+    )
+    if result is None:
+        return None
+    summary = f"Found {result['groups']} groups of similar images"
+    if result["ann_recall"] is not None:
+        summary += f" (ANN recall {result['ann_recall']:.3f})"
+    return summary
+
+
+def run_scan_blurry(args, image_files, stats, progress, cancelled):
+    result = scan_blurry(
+        args.folder,
+        image_files,
+        num_workers=args.workers,
+        scale=args.scale,
+        incremental=not args.full,
+        stats=stats,
+        progress=progress,
+        cancelled=cancelled,
+    )
+    if result is None:
+        return None
+    return f"Scored {result['scanned']} of {result['total']} images"
+
+
+def run_index(args, image_files, stats, progress, cancelled):
+    set_thumbnail_cache_max_bytes(args.thumbnail_cache_mb * 1024 * 1024)
+    result = index_library(
+        args.folder,
+        image_files,
+        thumbnails=args.thumbnails,
+        stats=stats,
+        progress=progress,
+        cancelled=cancelled,
+    )
+    if result is None:
+        return None
+    summary = f"Indexed {result['images']} images, encoded {result['encoded']}"
+    if args.thumbnails:
+        summary += f", {result['thumbnails']} thumbnails"
+    return summary
+
+
+def run_validate_encoder(args, image_files, stats, progress, cancelled):
+    image_files = image_files[: args.limit] if args.limit else image_files
+    progress(0, 0, f"Encoding {len(image_files)} images with both encoders...")
+    result = validate_encoder(image_files)
+    if result is None:
+        raise CommandFailed("No images could be encoded")
+    speedup = result["reference_seconds"] / max(result["encoder_seconds"], 1e-9)
+    return (
+        f"{result['backend']} on {result['images']} images: "
+        f"mean cosine {result['mean_cosine']:.4f}, "
+        f"min {result['min_cosine']:.4f}, "
+        f"{speedup:.2f}x the speed of fp32 PyTorch"
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="image-manager", description="Scan an image library without the GUI"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("folder", type=Path, help="Path to image folder")
+    common.add_argument(
+        "--walk-workers",
+        type=int,
+        default=1,
+        help="Threads used to list the folder tree",
+    )
+    common.add_argument(
+        "-v", "--verbose", action="store_true", help="Log engine details to stderr"
+    )
+    common.add_argument(
+        "--encoder",
+        choices=ENCODER_BACKENDS,
+        default="torch",
+        help="Backend for the CLIP image encoder",
+    )
+    common.add_argument(
+        "--int8",
+        action="store_true",
+        help="Quantize the torchscript or onnx encoder to int8",
+    )
+    common.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write stage timings, counts and peak memory to this JSON file",
+    )
+
+    similar = subparsers.add_parser(
+        "scan-similar", parents=[common], help="Group visually similar images"
+    )
+    similar.add_argument(
+        "--threshold",
+        type=float,
+        default=SIMILARITY_THRESHOLD,
+        help="Cosine similarity at which two images count as similar",
+    )
+    similar.add_argument(
+        "--search", choices=("auto", "exact", "ann"), default="auto"
+    )
+    similar.add_argument(
+        "--grouping", choices=sorted(GROUPING_METHODS), default="connected"
+    )
+    similar.set_defaults(run=run_scan_similar, needs_clip=True)
+
+    blurry = subparsers.add_parser(
+        "scan-blurry", parents=[common], help="Score images for blur"
+    )
+    blurry.add_argument("--workers", type=int, default=None)
+    blurry.add_argument(
+        "--scale",
+        type=int,
+        choices=(1, 2, 4, 8),
+        default=1,
+        help="Decode at 1/scale of full resolution",
+    )
+    blurry.add_argument(
+        "--full", action="store_true", help="Rescore images that have not changed"
+    )
+    blurry.set_defaults(run=run_scan_blurry, needs_clip=False)
+
+    index = subparsers.add_parser(
+        "index",
+        parents=[common],
+        help="Precompute hashes and embeddings so later scans only compare",
+    )
+    index.add_argument(
+        "--thumbnails", action="store_true", help="Also create thumbnail tiles"
+    )
+    index.add_argument(
+        "--thumbnail-cache-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Disk budget for thumbnail tiles; older tiles are evicted past it",
+    )
+    index.set_defaults(run=run_index, needs_clip=True)
+
+    validate = subparsers.add_parser(
+        "validate-encoder",
+        parents=[common],
+        help="Compare --encoder's embeddings with fp32 PyTorch",
+    )
+    validate.add_argument(
+        "--limit", type=int, default=256, help="Images to compare (0 for all)"
+    )
+    validate.set_defaults(run=run_validate_encoder, needs_clip=True)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+
+    if not args.folder.is_dir():
+        logging.error(f"Folder not found: {args.folder}")
+        return 1
+    set_encoder_backend(args.encoder, args.int8)
+    # Without CLIP a similar scan would save hash-only groups over the
+    # last real result
+    if args.needs_clip and not is_clip_available():
+        print(get_clip_status(), file=sys.stderr)
+        return 1
+
+    progress = ProgressReporter()
+    progress(0, 0, f"Listing {args.folder}...")
+    stats = scan_image_files(args.folder, args.walk_workers)
+    image_files = list(stats)
+    progress(0, 0, f"Found {len(image_files)} images")
+
+    cancelled = Interrupt()
+    failure = None
+    try:
+        summary = args.run(args, image_files, stats, progress, cancelled)
+    except CommandFailed as e:
+        summary = None
+        failure = str(e)
+    finally:
+        cancelled.restore()
+        progress.finish()
+
+    if args.metrics is not None:
+        metrics.save_report(
+            args.metrics, command=args.command, folder=str(args.folder)
+        )
+
+    if failure is not None:
+        print(failure, file=sys.stderr)
+        return 1
+    if summary is None:
+        print("Cancelled", file=sys.stderr)
+        return 130
+    print(summary)
+    return 0
@@ -9,27 +9,41 @@ from PyQt5.QtWidgets import (
     QApplication,
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 from pathlib import Path
 import logging
 
-from ..utils.file_ops import get_recursive_image_files, move_to_keep, restore_from_keep
+from ..utils.file_ops import move_to_keep, restore_from_keep
+from ..utils.library import ImageLibrary
+from ..utils.metrics import metrics
 from .widgets import ClickableImageLabel, LoadingSpinner
+from .thumbnail_loader import ThumbnailLoader
 from .keep_dialog import KeepDialog
 
+# Pages decoded ahead in the direction of travel, and behind it
+PREFETCH_AHEAD = 2
+PREFETCH_BEHIND = 1
+
 
 class BatchViewTab(QWidget):
-    def __init__(self, image_folder, batch_size=1000):
+    def __init__(self, image_folder, batch_size=1000, library=None):
         super().__init__()
         self.image_folder = Path(image_folder)
         self.batch_size = batch_size
         self.current_index = 0
+        # +1 after paging forward, -1 after paging back
+        self.direction = 1
 
         # Create keep folder if it doesn't exist
         self.keep_folder = self.image_folder / "keep"
         self.keep_folder.mkdir(exist_ok=True)
 
-        self.image_files = []
+        if library is None:
+            library = ImageLibrary(self.image_folder)
+        self.library = library
+        self.library.add_listener(self.apply_changes)
+        # Paths shown on the current page
+        self.page_paths = []
+        self.thumbnail_loader = ThumbnailLoader(self.image_folder, self)
         self.initUI()
         self.load_images()
 
@@ -73,18 +87,29 @@ class BatchViewTab(QWidget):
         self.layout.addLayout(action_layout)
         self.setLayout(self.layout)
 
+    @property
+    def image_files(self):
+        """Library paths, kept current by the library itself"""
+        return self.library.paths
+
     def load_images(self):
-        """Load image list and display current batch"""
-        self.image_files = list(get_recursive_image_files(self.image_folder))
+        """Display the current batch"""
         self.display_current_batch()
         self.update_status()
 
     def display_current_batch(self):
         """Display the current batch of images"""
+        with metrics.stage("qt.display_page"):
+            self.build_page()
+        self.prefetch_adjacent_pages()
+
+    def build_page(self):
         # Clear previous display
+        self.thumbnail_loader.reset()
         for i in reversed(range(self.grid_layout.count())):
             self.grid_layout.itemAt(i).widget().setParent(None)
 
+        self.page_paths = []
         if not self.image_files:
             no_results = QLabel("No images found")
             no_results.setAlignment(Qt.AlignCenter)
@@ -94,23 +119,34 @@ class BatchViewTab(QWidget):
         # Display current batch
         batch_end = min(self.current_index + 9, len(self.image_files))
         current_batch = self.image_files[self.current_index : batch_end]
+        self.page_paths = current_batch
 
         for i, img_path in enumerate(current_batch):
             try:
                 row, col = divmod(i, 3)
                 image_frame = ClickableImageLabel(self, root_folder=self.image_folder)
-                pixmap = QPixmap(str(img_path))
-                if pixmap.isNull():
-                    logging.error(f"Failed to load image: {img_path}")
-                    continue
-                image_frame.setPixmap(pixmap)
-                image_frame.image_path = img_path
+                self.thumbnail_loader.load(image_frame, img_path)
                 self.grid_layout.addWidget(image_frame, row, col)
             except Exception as e:
                 logging.error(f"Error displaying image {img_path}: {e}")
 
         self.update_button_states()
 
+    def prefetch_adjacent_pages(self):
+        """Decode the pages around the current one into the image cache.
+
+        Pages in the direction of travel come first, nearest first, so
+        arrow-key paging finds them already decoded.
+        """
+        offsets = [self.direction * (i + 1) for i in range(PREFETCH_AHEAD)]
+        offsets += [-self.direction * (i + 1) for i in range(PREFETCH_BEHIND)]
+        paths = []
+        for offset in offsets:
+            start = self.current_index + offset * 9
+            if 0 <= start < len(self.image_files):
+                paths.extend(self.image_files[start : start + 9])
+        self.thumbnail_loader.prefetch(paths)
+
     def update_status(self):
         """Update the status label with current position info"""
         if not self.image_files:
@@ -130,6 +166,7 @@ class BatchViewTab(QWidget):
     def prev_batch(self):
         """Show previous batch of images"""
         if self.current_index > 0:
+            self.direction = -1
             self.current_index = max(0, self.current_index - 9)
             self.display_current_batch()
             self.update_status()
@@ -137,26 +174,28 @@ class BatchViewTab(QWidget):
     def next_batch(self):
         """Show next batch of images"""
         if self.current_index + 9 < len(self.image_files):
+            self.direction = 1
             self.current_index += 9
             self.display_current_batch()
             self.update_status()
 
     def move_selected_to_keep(self):
         """Move selected images to keep folder"""
-        moved_count = 0
+        # Collect first: every move redraws the page through the library
+        selected = []
         for i in range(self.grid_layout.count()):
             widget = self.grid_layout.itemAt(i).widget()
             if isinstance(widget, ClickableImageLabel) and widget.selected:
-                if move_to_keep(widget.image_path, self.keep_folder):
-                    moved_count += 1
+                selected.append(widget.image_path)
 
+        moved_count = sum(move_to_keep(path, self.keep_folder) for path in selected)
         if moved_count > 0:
-            self.load_images()
+            logging.info(f"Moved {moved_count} images to keep")
 
     def restore_from_keep(self):
         """Open the keep dialog"""
         self.keep_dialog = KeepDialog(self.keep_folder, self.image_folder)
-        self.keep_dialog.finished.connect(self.load_images)
+        self.keep_dialog.finished.connect(self.refresh_view)
         self.keep_dialog.show()
 
     def keyPressEvent(self, event):
@@ -168,7 +207,17 @@ class BatchViewTab(QWidget):
         elif event.key() == Qt.Key_Delete:
             self.move_selected_to_keep()
 
+    def apply_changes(self, added, removed):
+        """Follow files added to or removed from the library"""
+        last_page = max(0, (len(self.image_files) - 1) // 9 * 9)
+        self.current_index = min(self.current_index, last_page)
+        page = self.image_files[self.current_index : self.current_index + 9]
+        if page != self.page_paths:
+            self.display_current_batch()
+        self.update_status()
+        self.update_button_states()
+
     def refresh_view(self):
         """Refresh the image display"""
-        self.image_files = list(get_recursive_image_files(self.image_folder))
         self.display_current_batch()
+        self.update_status()
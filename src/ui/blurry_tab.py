@@ -6,31 +6,48 @@ from PyQt5.QtWidgets import (
     QLabel,
     QGridLayout,
     QScrollArea,
-    QApplication,
+    QSpinBox,
+    QMessageBox,
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 from pathlib import Path
 import logging
 
-from ..utils.cache import load_cache, save_cache
-from ..utils.image_processing import is_blurry, detect_noise
-from ..utils.file_ops import get_recursive_image_files
+from ..utils.catalog import Catalog
+from ..utils.file_ops import move_to_limbo
+from ..utils.scanners import scan_blurry
+from ..utils.quality import BLUR_THRESHOLD, NOISE_THRESHOLD
+from ..utils.library import ImageLibrary
 from .widgets import ClickableImageLabel, LoadingSpinner
+from .thumbnail_loader import ThumbnailLoader
+from .workers import ScanWorker
 
 
 class BlurryImagesTab(QWidget):
-    def __init__(self, image_folder, batch_size=1000):
+    def __init__(self, image_folder, batch_size=1000, library=None):
         super().__init__()
         self.image_folder = Path(image_folder)
         self.batch_size = batch_size
         self.current_index = 0
-        self.image_files = []
+        if library is None:
+            library = ImageLibrary(self.image_folder)
+        self.library = library
+        self.library.add_listener(self.apply_changes)
+        # Only the page on screen is loaded; the catalog holds the rest
         self.bad_images = []
+        self.bad_count = 0
         self.scanning = False
+        self.catalog = Catalog(self.image_folder)
+        # Drop files removed or edited while the app was closed; the stats
+        # are already in memory, so this costs no extra walk
+        self.catalog.sync_files(self.library.paths, self.library.files)
+        self.thumbnail_loader = ThumbnailLoader(self.image_folder, self)
         self.initUI()
         self.load_images()
 
+        # Show cached scores straight away; a scan only adds what changed
+        self.apply_thresholds()
+
     def initUI(self):
         self.layout = QVBoxLayout()
 
@@ -67,90 +84,130 @@ class BlurryImagesTab(QWidget):
         action_layout.addWidget(self.scan_button)
         action_layout.addWidget(self.move_button)
 
+        # Threshold controls re-filter the cached scores without rescanning
+        threshold_layout = QHBoxLayout()
+        self.blur_threshold_input = QSpinBox()
+        self.blur_threshold_input.setRange(0, 100000)
+        self.blur_threshold_input.setValue(BLUR_THRESHOLD)
+        self.blur_threshold_input.setToolTip(
+            "Images with a sharpness (Laplacian variance) below this are blurry"
+        )
+        self.noise_threshold_input = QSpinBox()
+        self.noise_threshold_input.setRange(0, 100000)
+        self.noise_threshold_input.setValue(NOISE_THRESHOLD)
+        self.noise_threshold_input.setToolTip(
+            "Images with a noise level above this are noisy"
+        )
+        self.blur_threshold_input.valueChanged.connect(self.apply_thresholds)
+        self.noise_threshold_input.valueChanged.connect(self.apply_thresholds)
+
+        threshold_layout.addWidget(QLabel("Blur threshold:"))
+        threshold_layout.addWidget(self.blur_threshold_input)
+        threshold_layout.addWidget(QLabel("Noise threshold:"))
+        threshold_layout.addWidget(self.noise_threshold_input)
+        threshold_layout.addStretch()
+
+        self.layout.addLayout(threshold_layout)
         self.layout.addLayout(nav_layout)
         self.layout.addLayout(action_layout)
         self.setLayout(self.layout)
         self.update_button_states()
 
+    @property
+    def image_files(self):
+        """Library paths, kept current by the library itself"""
+        return self.library.paths
+
     def load_images(self):
-        """Load image list from folder"""
-        self.image_files = list(get_recursive_image_files(self.image_folder))
+        """Show the library size"""
         self.update_status()
 
     def find_bad_images(self):
+        """Scan images added or changed since they were last scored"""
         if self.scanning:
             return
 
         self.scanning = True
-        logging.info("Starting blurry image scan")
-
-        # Try to load from cache
-        cached_data = load_cache(self.image_folder, "blurry")
-        if cached_data is not None:
-            self.bad_images = [Path(p) for p in cached_data["bad_images"]]
-            self.current_index = 0
-            self.display_bad_images()
-            self.scanning = False
-            return
-
-        spinner = LoadingSpinner(
+        self.scan_button.setEnabled(False)
+
+        self.worker = ScanWorker(
+            scan_blurry,
+            self.image_folder,
+            # Snapshots; the library keeps changing while the scan runs
+            list(self.image_files),
+            stats=dict(self.library.files),
+            parent=self,
+        )
+        self.spinner = LoadingSpinner(
             self,
             "Scanning for blurry and noisy images...",
             cancellable=True,
         )
-        spinner.show()
-
-        try:
-            self.bad_images = []
-            total_images = len(self.image_files)
-
-            for i, img_path in enumerate(self.image_files):
-                if spinner.was_cancelled:
-                    self.status_label.setText("Scan cancelled")
-                    break
+        self.spinner.attach(self.worker)
+        self.worker.partial_result.connect(self.on_partial_scores)
+        self.worker.cancelled.connect(self.on_scan_cancelled)
+        self.worker.failed.connect(self.on_scan_failed)
+        self.worker.finished.connect(self.on_scan_finished)
+        self.spinner.show()
+        self.worker.start()
+
+    def thresholds(self):
+        return self.blur_threshold_input.value(), self.noise_threshold_input.value()
+
+    def apply_thresholds(self):
+        """Re-filter the scored images, worst first"""
+        self.current_index = 0
+        self.display_bad_images()
+
+    def load_page(self):
+        """Fetch the count and the current page of bad images from the catalog"""
+        thresholds = self.thresholds()
+        self.bad_count = self.catalog.count_bad_images(*thresholds)
+        self.bad_images = self.catalog.bad_images(
+            *thresholds, limit=9, offset=self.current_index
+        )
 
-                spinner.progress.setLabelText(f"Scanning image {i+1} of {total_images}")
-                QApplication.processEvents()
+    def on_partial_scores(self, scores):
+        """Fill the first page as soon as the scan has found enough images"""
+        if self.bad_count < 9:
+            self.display_bad_images()
+        else:
+            self.bad_count = self.catalog.count_bad_images(*self.thresholds())
+            self.update_status()
+            self.update_button_states()
 
-                if is_blurry(str(img_path)) or detect_noise(str(img_path)):
-                    self.bad_images.append(img_path)
+    def on_scan_cancelled(self):
+        self.status_label.setText("Scan cancelled")
 
-            if not spinner.was_cancelled:
-                # Save to cache
-                cache_data = {"bad_images": [str(p) for p in self.bad_images]}
-                save_cache(self.image_folder, cache_data, "blurry")
+    def on_scan_failed(self, message):
+        QMessageBox.critical(self, "Scan Failed", message)
 
-        finally:
-            spinner.close()
-            self.scanning = False
-            self.display_bad_images()
+    def on_scan_finished(self):
+        self.scanning = False
+        self.scan_button.setEnabled(True)
+        self.display_bad_images()
 
     def display_bad_images(self):
         """Display the current batch of bad images"""
         # Clear previous display
+        self.thumbnail_loader.reset()
         for i in reversed(range(self.grid_layout.count())):
             self.grid_layout.itemAt(i).widget().setParent(None)
 
+        self.load_page()
         if not self.bad_images:
             no_results = QLabel("No blurry or noisy images found")
             no_results.setAlignment(Qt.AlignCenter)
             self.grid_layout.addWidget(no_results, 0, 0, 1, 3)
+            self.update_status()
+            self.update_button_states()
             return
 
-        # Display current batch
-        batch_end = min(self.current_index + 9, len(self.bad_images))
-        current_batch = self.bad_images[self.current_index : batch_end]
-
-        for i, img_path in enumerate(current_batch):
+        for i, img_path in enumerate(self.bad_images):
             try:
                 row, col = divmod(i, 3)
                 image_frame = ClickableImageLabel(self, root_folder=self.image_folder)
-                pixmap = QPixmap(str(img_path))
-                if pixmap.isNull():
-                    logging.error(f"Failed to load image: {img_path}")
-                    continue
-                image_frame.setPixmap(pixmap)
-                image_frame.image_path = img_path
+                self.thumbnail_loader.load(image_frame, img_path)
                 self.grid_layout.addWidget(image_frame, row, col)
             except Exception as e:
                 logging.error(f"Error displaying image {img_path}: {e}")
@@ -160,19 +217,19 @@ class BlurryImagesTab(QWidget):
 
     def update_status(self):
         """Update the status label with current position info"""
-        if not self.bad_images:
+        if not self.bad_count:
             self.status_label.setText("No blurry or noisy images found")
             return
 
-        batch_end = min(self.current_index + 9, len(self.bad_images))
+        batch_end = min(self.current_index + 9, self.bad_count)
         self.status_label.setText(
-            f"Showing images {self.current_index + 1}-{batch_end} of {len(self.bad_images)}"
+            f"Showing images {self.current_index + 1}-{batch_end} of {self.bad_count}"
         )
 
     def update_button_states(self):
         """Update navigation button states"""
         self.prev_button.setEnabled(self.current_index > 0)
-        self.next_button.setEnabled(self.current_index + 9 < len(self.bad_images))
+        self.next_button.setEnabled(self.current_index + 9 < self.bad_count)
 
     def prev_batch(self):
         """Show previous batch of images"""
@@ -182,7 +239,7 @@ class BlurryImagesTab(QWidget):
 
     def next_batch(self):
         """Show next batch of images"""
-        if self.current_index + 9 < len(self.bad_images):
+        if self.current_index + 9 < self.bad_count:
             self.current_index += 9
             self.display_bad_images()
 
@@ -191,15 +248,20 @@ class BlurryImagesTab(QWidget):
         limbo_folder = self.image_folder / "limbo"
         limbo_folder.mkdir(exist_ok=True)
 
-        moved_count = 0
+        # Collect first: every move redraws the page through the library
+        selected = []
         for i in range(self.grid_layout.count()):
             widget = self.grid_layout.itemAt(i).widget()
             if isinstance(widget, ClickableImageLabel) and widget.selected:
-                if move_to_limbo(widget.image_path, limbo_folder):
-                    moved_count += 1
+                selected.append(widget.image_path)
 
+        moved_count = sum(move_to_limbo(path, limbo_folder) for path in selected)
         if moved_count > 0:
-            # Refresh image lists
-            self.image_files = list(get_recursive_image_files(self.image_folder))
-            self.bad_images = [img for img in self.bad_images if img.exists()]
+            logging.info(f"Moved {moved_count} images to limbo")
+
+    def apply_changes(self, added, removed):
+        """Drop removed files from the results on screen"""
+        if removed:
+            self.catalog.remove_files(removed)
+        if not self.scanning:
             self.display_bad_images()
@@ -0,0 +1,119 @@
+from PyQt5.QtGui import QImage
+from collections import OrderedDict
+import logging
+import os
+import threading
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ImageCache:
+    """Process-wide LRU cache of decoded images, bounded by memory in bytes.
+
+    Entries are QImages so worker threads can fill the cache too; the GUI
+    turns them into pixmaps when it draws. Keys include the file's mtime,
+    so an edited image is never served stale.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_path, variant):
+        """Key for one rendering (``thumb``, ``full``...) of a file"""
+        try:
+            mtime = os.stat(image_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (str(image_path), mtime, variant)
+
+    def get(self, key):
+        with self._lock:
+            image = self.entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def peek(self, key):
+        """Fetch an entry without counting a hit or miss, for repaints"""
+        with self._lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+            return image
+
+    def contains(self, key):
+        """Check for an entry without touching the counters or LRU order"""
+        with self._lock:
+            return key in self.entries
+
+    def put(self, key, image):
+        if image is None or image.isNull():
+            return
+        size = image.sizeInBytes()
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.sizeInBytes()
+            self.entries[key] = image
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.sizeInBytes()
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.sizeInBytes()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def log_stats(self):
+        stats = self.stats()
+        logging.info(
+            f"Image cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%}), {stats['entries']} images, "
+            f"{stats['bytes'] / 2**20:.1f} of {stats['max_bytes'] / 2**20:.0f} MB"
+        )
+
+
+# Shared by every tab and viewer
+image_cache = ImageCache()
+
+
+def load_cached_image(image_path, variant="full", loader=None):
+    """Return a QImage for ``image_path`` from the shared cache, loading it with
+    ``loader(image_path)`` (or a plain full-size decode) on a miss"""
+    key = ImageCache.make_key(image_path, variant)
+    image = image_cache.get(key)
+    if image is None:
+        image = loader(image_path) if loader is not None else QImage(str(image_path))
+        image_cache.put(key, image)
+    return image
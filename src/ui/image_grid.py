@@ -0,0 +1,180 @@
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QPoint, QSize
+from PyQt5.QtGui import QColor, QPainter, QPen
+from pathlib import Path
+import bisect
+
+from ..utils.metrics import metrics
+from .widgets import ExpandedImageWindow
+
+PATH_ROLE = Qt.UserRole
+PLACEHOLDER_ROLE = Qt.UserRole + 1
+
+# Same footprint as a ClickableImageLabel cell
+CELL_SIZE = QSize(250, 250)
+NAME_HEIGHT = 20
+# Larger changes reset the model instead of moving rows one at a time
+MAX_ROW_CHANGES = 100
+
+
+class ImageListModel(QAbstractListModel):
+    """Sorted list of image paths whose thumbnails are fetched only when
+    painted.
+
+    The model keeps nothing but paths; decoded thumbnails live in the
+    shared, byte-bounded image cache, so memory does not grow with the
+    number of files.
+    """
+
+    def __init__(self, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.thumbnail_loader.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.paths = []
+        self.failed = set()
+
+    def _row(self, image_path):
+        row = bisect.bisect_left(self.paths, image_path)
+        if row < len(self.paths) and self.paths[row] == image_path:
+            return row
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        image_path = self.paths[index.row()]
+        if role == Qt.DisplayRole:
+            return image_path.name
+        if role == Qt.ToolTipRole:
+            return str(image_path)
+        if role == PATH_ROLE:
+            return image_path
+        if role == Qt.DecorationRole:
+            image = self.thumbnail_loader.cached(image_path)
+            if image is None and str(image_path) not in self.failed:
+                self.thumbnail_loader.request(image_path)
+            return image
+        if role == PLACEHOLDER_ROLE:
+            if str(image_path) in self.failed:
+                return "Unable to load image"
+            return "Loading..."
+        return None
+
+    def set_paths(self, image_paths):
+        self.beginResetModel()
+        self.thumbnail_loader.reset()
+        self.paths = sorted(image_paths)
+        self.failed = set()
+        self.endResetModel()
+
+    def apply_changes(self, added, removed):
+        """Insert and remove rows, keeping the selection on the other rows"""
+        if len(added) + len(removed) > MAX_ROW_CHANGES:
+            removed = set(removed)
+            paths = [p for p in self.paths if p not in removed]
+            self.set_paths(paths + [p for p in added if self._row(p) is None])
+            return
+
+        for image_path in removed:
+            row = self._row(image_path)
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.paths[row]
+                self.endRemoveRows()
+        for image_path in sorted(added):
+            if self._row(image_path) is None:
+                row = bisect.bisect_left(self.paths, image_path)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.paths.insert(row, image_path)
+                self.endInsertRows()
+
+    def on_thumbnail_ready(self, key, image):
+        if image.isNull():
+            self.failed.add(key)
+        row = self._row(Path(key))
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Paints a cell like ClickableImageLabel: framed thumbnail and file name"""
+
+    def sizeHint(self, option, index):
+        return CELL_SIZE
+
+    def paint(self, painter, option, index):
+        with metrics.stage("qt.paint_cell"):
+            self.paint_cell(painter, option, index)
+
+    def paint_cell(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(5, 5, -5, -5)
+        painter.fillRect(rect, Qt.white)
+        selected = option.state & QStyle.State_Selected
+        painter.setPen(QPen(QColor("red") if selected else QColor("gray"), 2))
+        painter.drawRect(rect)
+
+        image_rect = rect.adjusted(5, 5, -5, -(NAME_HEIGHT + 5))
+        image = index.data(Qt.DecorationRole)
+        if image is None or image.isNull():
+            painter.setPen(Qt.gray)
+            painter.drawText(
+                image_rect, Qt.AlignCenter, index.data(PLACEHOLDER_ROLE)
+            )
+        else:
+            target = QRect(
+                QPoint(0, 0), image.size().scaled(image_rect.size(), Qt.KeepAspectRatio)
+            )
+            target.moveCenter(image_rect.center())
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawImage(target, image)
+
+        name_rect = QRect(
+            rect.left() + 5, rect.bottom() - NAME_HEIGHT, rect.width() - 10, NAME_HEIGHT
+        )
+        name = option.fontMetrics.elidedText(
+            index.data(Qt.DisplayRole), Qt.ElideMiddle, name_rect.width()
+        )
+        painter.setPen(Qt.black)
+        painter.drawText(name_rect, Qt.AlignCenter, name)
+        painter.restore()
+
+
+class ImageGridView(QListView):
+    """Virtualized thumbnail grid; only the visible cells are ever painted.
+
+    Click to select (Ctrl/Shift for more), double-click to view full size.
+    """
+
+    def __init__(self, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        self.image_model = ImageListModel(thumbnail_loader, self)
+        self.setModel(self.image_model)
+        self.setItemDelegate(ThumbnailDelegate(self))
+        self.doubleClicked.connect(self.show_expanded)
+
+    def set_paths(self, image_paths):
+        self.image_model.set_paths(image_paths)
+
+    def apply_changes(self, added, removed):
+        self.image_model.apply_changes(added, removed)
+
+    def selected_paths(self):
+        indexes = sorted(self.selectedIndexes(), key=lambda index: index.row())
+        return [index.data(PATH_ROLE) for index in indexes]
+
+    def show_expanded(self, index):
+        """Show the expanded image window"""
+        dialog = ExpandedImageWindow(index.data(PATH_ROLE), self)
+        dialog.exec_()
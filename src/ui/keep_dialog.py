@@ -4,17 +4,15 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QPushButton,
     QLabel,
-    QGridLayout,
-    QScrollArea,
 )
 from PyQt5.QtCore import Qt, QObject, pyqtSignal
-from PyQt5.QtGui import QPixmap
 from pathlib import Path
 import logging
 import os
 
 from ..utils.file_ops import restore_from_keep
-from .widgets import ClickableImageLabel
+from .thumbnail_loader import ThumbnailLoader
+from .image_grid import ImageGridView
 
 
 class KeepDialogSignals(QObject):
@@ -30,6 +28,7 @@ class KeepDialog(QWidget):
         # Set up signals
         self.signals = KeepDialogSignals()
         self.finished = self.signals.finished
+        self.thumbnail_loader = ThumbnailLoader(self.main_folder, self)
 
         self.initUI()
         self.load_keep_images()
@@ -44,14 +43,9 @@ class KeepDialog(QWidget):
         self.status_label.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.status_label)
 
-        # Scrollable area for images
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.scroll_widget = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_widget)
-        self.scroll_area.setWidget(self.scroll_widget)
-        self.layout.addWidget(self.scroll_area)
+        # Thumbnail grid, only the visible cells are loaded
+        self.image_view = ImageGridView(self.thumbnail_loader, self)
+        self.layout.addWidget(self.image_view)
 
         # Action buttons
         button_layout = QHBoxLayout()
@@ -68,49 +62,24 @@ class KeepDialog(QWidget):
 
     def load_keep_images(self):
         """Load and display all images from keep"""
-        self.keep_files = list(self.keep_folder.glob("*.*"))
-
-        # Clear previous display
-        for i in reversed(range(self.grid_layout.count())):
-            self.grid_layout.itemAt(i).widget().setParent(None)
-
-        if not self.keep_files:
-            no_results = QLabel("No images in keep")
-            no_results.setAlignment(Qt.AlignCenter)
-            self.grid_layout.addWidget(no_results, 0, 0, 1, 3)
-            self.update_status()
-            return
-
-        # Display images
-        for i, img_path in enumerate(self.keep_files):
-            try:
-                row, col = divmod(i, 3)
-                image_frame = ClickableImageLabel(self)
-                pixmap = QPixmap(str(img_path))
-                if pixmap.isNull():
-                    logging.error(f"Failed to load image: {img_path}")
-                    continue
-                image_frame.setPixmap(pixmap)
-                image_frame.image_path = img_path
-                self.grid_layout.addWidget(image_frame, row, col)
-            except Exception as e:
-                logging.error(f"Error displaying image {img_path}: {e}")
-
+        self.keep_files = sorted(self.keep_folder.glob("*.*"))
+        self.image_view.set_paths(self.keep_files)
         self.update_status()
 
     def update_status(self):
         """Update status label"""
         count = len(self.keep_files)
+        if not count:
+            self.status_label.setText("No images in keep")
+            return
         self.status_label.setText(f"Images in keep: {count}")
 
     def restore_selected(self):
         """Restore selected images to main folder"""
         restored_count = 0
-        for i in range(self.grid_layout.count()):
-            widget = self.grid_layout.itemAt(i).widget()
-            if isinstance(widget, ClickableImageLabel) and widget.selected:
-                if restore_from_keep(widget.image_path, self.main_folder):
-                    restored_count += 1
+        for img_path in self.image_view.selected_paths():
+            if restore_from_keep(img_path, self.main_folder):
+                restored_count += 1
 
         if restored_count > 0:
             logging.info(f"Restored {restored_count} images from keep")
@@ -119,14 +88,12 @@ class KeepDialog(QWidget):
     def delete_selected(self):
         """Permanently delete selected images"""
         deleted_count = 0
-        for i in range(self.grid_layout.count()):
-            widget = self.grid_layout.itemAt(i).widget()
-            if isinstance(widget, ClickableImageLabel) and widget.selected:
-                try:
-                    os.remove(widget.image_path)
-                    deleted_count += 1
-                except Exception as e:
-                    logging.error(f"Error deleting {widget.image_path}: {e}")
+        for img_path in self.image_view.selected_paths():
+            try:
+                os.remove(img_path)
+                deleted_count += 1
+            except Exception as e:
+                logging.error(f"Error deleting {img_path}: {e}")
 
         if deleted_count > 0:
             logging.info(f"Permanently deleted {deleted_count} images")
@@ -0,0 +1,144 @@
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer
+from pathlib import Path
+import logging
+import os
+
+from ..utils.file_ops import list_directory, scan_library
+
+# Directory events are collected for this long before they are applied
+DEBOUNCE_MS = 200
+POLL_INTERVAL_MS = 5000
+
+
+def _within(path, directory):
+    """True if ``path`` is ``directory`` or below it (both in Path form)"""
+    return (
+        path == directory
+        or directory == os.curdir
+        or path.startswith(directory.rstrip(os.sep) + os.sep)
+    )
+
+
+class LibraryWatcher(QObject):
+    """Keeps an ImageLibrary in step with changes made outside the app.
+
+    Directories are watched with QFileSystemWatcher (inotify on Linux).
+    When that is unavailable or runs out of watches, directory mtimes are
+    polled instead. Either way only directories that changed are listed
+    again, and the difference goes to ``library.apply_changes``. A rename
+    shows up as a removal plus an addition.
+    """
+
+    def __init__(self, library, polling=False, parent=None):
+        super().__init__(parent)
+        self.library = library
+        self.root = str(library.folder)
+        self.excluded = library.excluded
+        self.directories = library.directories
+        self.dirty = set()
+
+        self.debounce = QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(DEBOUNCE_MS)
+        self.debounce.timeout.connect(self.flush)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+
+        self.watcher = None
+        if not polling:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.on_directory_changed)
+            self._watch(self.directories)
+        if self.watcher is None:
+            self.poll_timer.start()
+
+    def _watch(self, directories):
+        if self.watcher is None or not directories:
+            return
+        failed = self.watcher.addPaths(list(directories))
+        if failed:
+            logging.warning(
+                f"Cannot watch {len(failed)} directories, polling {self.root} instead"
+            )
+            self.watcher.deleteLater()
+            self.watcher = None
+            self.poll_timer.start()
+
+    def _unwatch(self, directories):
+        if self.watcher is not None and directories:
+            self.watcher.removePaths(list(directories))
+
+    def on_directory_changed(self, directory):
+        self.dirty.add(directory)
+        self.debounce.start()
+
+    def poll(self):
+        """Mark directories whose mtime moved, then apply the changes"""
+        for directory, mtime_ns in list(self.directories.items()):
+            try:
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    self.dirty.add(directory)
+            except OSError:
+                self.dirty.add(directory)
+        self.flush()
+
+    def check_now(self):
+        """Pick up changes right away instead of waiting for the next event"""
+        self.debounce.stop()
+        self.poll()
+
+    def flush(self):
+        added = {}
+        removed = []
+        dirty, self.dirty = self.dirty, set()
+        for directory in sorted(dirty):
+            if directory in self.directories:
+                self._rescan(directory, added, removed)
+
+        if added or removed:
+            self.library.apply_changes(added, removed)
+
+    def _rescan(self, directory, added, removed):
+        excluded = self.excluded if directory == self.root else ()
+        files, subdirectories, mtime_ns = list_directory(directory, excluded)
+        if mtime_ns is None:
+            self._drop_tree(directory, removed)
+            return
+        self.directories[directory] = mtime_ns
+
+        current = {Path(path): stat for path, stat in files}
+        known = self.library.by_directory.get(directory, set())
+        removed.extend(known - current.keys())
+        added.update(current)
+
+        subdirectories = set(subdirectories)
+        for known_directory in list(self.directories):
+            if (
+                known_directory != directory
+                and str(Path(known_directory).parent) == directory
+                and known_directory not in subdirectories
+            ):
+                self._drop_tree(known_directory, removed)
+        for subdirectory in subdirectories - self.directories.keys():
+            self._add_tree(subdirectory, added)
+
+    def _add_tree(self, directory, added):
+        files, directories = scan_library(directory, excluded=())
+        added.update(files)
+        self.directories.update(directories)
+        self._watch(directories)
+
+    def _drop_tree(self, directory, removed):
+        gone = [d for d in self.directories if _within(d, directory)]
+        for d in gone:
+            del self.directories[d]
+            removed.extend(self.library.by_directory.get(d, ()))
+        self._unwatch(gone)
+
+    def stop(self):
+        self.debounce.stop()
+        self.poll_timer.stop()
+        if self.watcher is not None:
+            self.watcher.directoryChanged.disconnect(self.on_directory_changed)
@@ -1,12 +1,27 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QTabWidget
+from PyQt5.QtWidgets import (
+    QMainWindow,
+    QWidget,
+    QVBoxLayout,
+    QTabWidget,
+    QShortcut,
+)
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QKeySequence
+from pathlib import Path
 import logging
-import torch
 
 from .batch_tab import BatchViewTab
-from .similar_tab import SimilarImagesTab
-from .blurry_tab import BlurryImagesTab
-from .trash_tab import TrashTab
+from .image_cache import image_cache
+from .library_watcher import LibraryWatcher
+from ..utils.library import ImageLibrary
+
+# (attribute, title) of each tab, in display order
+TABS = [
+    ("batch_tab", "Batch View"),
+    ("similar_tab", "Similar Images"),
+    ("blurry_tab", "Blurry/Noisy Images"),
+    ("trash_tab", "Trash"),
+]
 
 
 class ImageManager(QMainWindow):
@@ -27,40 +42,95 @@ class ImageManager(QMainWindow):
         # Create tab widget
         self.tabs = QTabWidget()
 
-        # Create and add tabs
-        self.batch_tab = BatchViewTab(self.image_folder)
-        self.similar_tab = SimilarImagesTab(self.image_folder)
-        self.blurry_tab = BlurryImagesTab(self.image_folder)
-        self.trash_tab = TrashTab(self.image_folder)
-
-        self.tabs.addTab(self.batch_tab, "Batch View")
-        self.tabs.addTab(self.similar_tab, "Similar Images")
-        self.tabs.addTab(self.blurry_tab, "Blurry/Noisy Images")
-        self.tabs.addTab(self.trash_tab, "Trash")
+        # One walk each for the library and the trash, shared by every tab
+        self.library = ImageLibrary(self.image_folder)
+        # Created up front so the trash can be listed and watched
+        trash_folder = Path(self.image_folder) / "trash"
+        trash_folder.mkdir(exist_ok=True)
+        self.trash = ImageLibrary(trash_folder, excluded=())
 
-        # Connect refresh signals
-        self.batch_tab.refresh_view = self.refresh_all_tabs
-        self.similar_tab.refresh_view = self.refresh_all_tabs
-        self.blurry_tab.refresh_view = self.refresh_all_tabs
-        self.trash_tab.refresh_view = self.refresh_all_tabs
+        # Tabs are built the first time they are shown; until then they
+        # hold an empty placeholder
+        for attribute, title in TABS:
+            setattr(self, attribute, None)
+            self.tabs.addTab(QWidget(), title)
+        self.tabs.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(0)
 
         layout.addWidget(self.tabs)
 
-    def refresh_all_tabs(self):
-        """Refresh all tabs when files are moved"""
-        self.batch_tab.load_images()
-        self.trash_tab.load_images()
-        # Only refresh other tabs if they're visible
-        current_tab = self.tabs.currentWidget()
-        if current_tab == self.similar_tab:
-            self.similar_tab.load_images()
-        elif current_tab == self.blurry_tab:
-            self.blurry_tab.load_images()
+        # Moves made through file_ops reach the libraries as events; the
+        # watchers pick up changes made outside the app
+        self.library_watcher = LibraryWatcher(self.library, parent=self)
+        self.trash_watcher = LibraryWatcher(self.trash, parent=self)
+
+        # Debug panel with stage timings and memory
+        self.metrics_panel = None
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, self.show_metrics_panel)
+
+    def show_metrics_panel(self):
+        if self.metrics_panel is None:
+            from .metrics_panel import MetricsPanel
+
+            self.metrics_panel = MetricsPanel(self)
+        self.metrics_panel.show()
+        self.metrics_panel.raise_()
+
+    def create_tab(self, attribute):
+        """Build a tab; the scan tabs import their heavy modules here"""
+        if attribute == "batch_tab":
+            return BatchViewTab(self.image_folder, library=self.library)
+        if attribute == "similar_tab":
+            from .similar_tab import SimilarImagesTab
+
+            return SimilarImagesTab(self.image_folder, library=self.library)
+        if attribute == "blurry_tab":
+            from .blurry_tab import BlurryImagesTab
+
+            return BlurryImagesTab(self.image_folder, library=self.library)
+        from .trash_tab import TrashTab
+
+        return TrashTab(self.image_folder, library=self.trash)
+
+    def ensure_tab(self, index):
+        """Replace a tab's placeholder with the real tab"""
+        attribute, title = TABS[index]
+        if getattr(self, attribute) is not None:
+            return
+        logging.info(f"Building {title} tab")
+        tab = self.create_tab(attribute)
+        setattr(self, attribute, tab)
+
+        placeholder = self.tabs.widget(index)
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, tab, title)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+
+    def built_tabs(self):
+        tabs = (getattr(self, attribute) for attribute, _ in TABS)
+        return [tab for tab in tabs if tab is not None]
 
     def closeEvent(self, event):
         """Clean up resources before closing"""
         logging.info("Closing application")
+        self.library_watcher.stop()
+        self.trash_watcher.stop()
+        self.library.close()
+        self.trash.close()
+        # Stop any scan still running in the background
+        for tab in self.built_tabs():
+            worker = getattr(tab, "worker", None)
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait()
+        for tab in self.built_tabs():
+            tab.thumbnail_loader.shutdown()
+        image_cache.log_stats()
         # Clean up CUDA memory if using GPU
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        from ..utils.image_processing import release_model_memory
+
+        release_model_memory()
         event.accept()
@@ -0,0 +1,120 @@
+from PyQt5.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QFileDialog,
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from ..utils.metrics import metrics
+
+REFRESH_MS = 1000
+COLUMNS = ["Stage", "Count", "Total (s)", "Mean (ms)", "p50", "p90", "p99", "Max"]
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+class MetricsPanel(QWidget):
+    """Debug window with live stage timings, counters and peak memory.
+
+    Shows everything recorded since the app started or the panel was last
+    reset.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.since = None
+        self.initUI()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def initUI(self):
+        self.setWindowTitle("Performance Metrics")
+        self.setMinimumSize(800, 500)
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        save_button = QPushButton("Save Report...")
+        reset_button.clicked.connect(self.reset)
+        save_button.clicked.connect(self.save_report)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(save_button)
+        layout.addLayout(button_layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        report = metrics.report(since=self.since)
+        stages = report["stages"]
+        self.table.setRowCount(len(stages))
+        for row, (name, stage) in enumerate(stages.items()):
+            values = [
+                name,
+                str(stage["count"]),
+                f"{stage['total_s']:.2f}",
+                f"{stage['mean_ms']:.2f}",
+                f"{stage['p50_ms']:.2f}",
+                f"{stage['p90_ms']:.2f}",
+                f"{stage['p99_ms']:.2f}",
+                f"{stage['max_ms']:.2f}",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+
+        lines = [f"{name}: {n}" for name, n in report["counters"].items()]
+        lines += [
+            f"{name}: {format_bytes(n)}" for name, n in report["bytes"].items()
+        ]
+        if report["peak_rss_bytes"] is not None:
+            lines.append(f"Peak memory: {format_bytes(report['peak_rss_bytes'])}")
+        if not metrics.enabled:
+            lines.append("Recording is off (IMAGE_MANAGER_METRICS=0)")
+        self.summary_label.setText("    ".join(lines))
+
+    def reset(self):
+        self.since = metrics.snapshot()
+        self.refresh()
+
+    def save_report(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Save Metrics Report", "metrics.json", "JSON (*.json)"
+        )
+        if path:
+            metrics.save_report(path, since=self.since)
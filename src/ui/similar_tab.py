@@ -6,48 +6,65 @@ from PyQt5.QtWidgets import (
     QLabel,
     QGridLayout,
     QScrollArea,
-    QApplication,
     QMessageBox,
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 from pathlib import Path
 import logging
-import traceback
-import torch
-
-from ..utils.cache import save_cache, load_cache, clear_cache
-from ..utils.image_processing import (
-    are_images_similar,
-    is_clip_available,
-    get_clip_status,
-)
-from ..utils.file_ops import get_recursive_image_files, move_to_keep
+
+from ..utils.image_processing import is_clip_available, get_clip_status
+from ..utils.catalog import Catalog
+from ..utils.scanners import scan_similar
+from ..utils.file_ops import move_to_limbo
+from ..utils.library import ImageLibrary
 from .widgets import ClickableImageLabel, LoadingSpinner
+from .thumbnail_loader import ThumbnailLoader
+from .workers import ScanWorker
 
 
 class SimilarImagesTab(QWidget):
-    def __init__(self, image_folder, batch_size=1000):
+    def __init__(
+        self,
+        image_folder,
+        batch_size=1000,
+        search_mode="auto",
+        grouping="connected",
+        library=None,
+    ):
         super().__init__()
         self.image_folder = Path(image_folder)
         self.batch_size = batch_size
+        self.search_mode = search_mode
+        self.grouping = grouping
+        self.ann_recall = None
         self.current_index = 0
-        self.image_files = []
+        if library is None:
+            library = ImageLibrary(self.image_folder)
+        self.library = library
+        self.library.add_listener(self.apply_changes)
+        # Only the groups on screen are loaded; the catalog holds the rest
         self.similar_groups = []
+        self.group_count = 0
+        self.image_count = 0
+        # Near-duplicate groups shown while a scan is still running
+        self.partial_groups = None
         self.scanning = False
+        self.catalog = Catalog(self.image_folder)
+        # Drop files removed or edited while the app was closed; the stats
+        # are already in memory, so this costs no extra walk
+        self.catalog.sync_files(self.library.paths, self.library.files)
+        self.thumbnail_loader = ThumbnailLoader(self.image_folder, self)
 
         self.initUI()
         self.load_images()
 
-        # Try to load from cache first
-        cached_groups = load_cache(self.image_folder, "similar")
-        if cached_groups is not None:
-            logging.info("Using cached similar image groups")
-            self.similar_groups = cached_groups
-            self.current_index = 0
-            self.display_similar_groups()
-            self.scanning = False
-            return
+        # Show groups from the last scan straight away
+        self.display_similar_groups()
+        if self.catalog.similar_scan_is_stale():
+            self.status_label.setText(
+                self.status_label.text()
+                + " - library changed since the last scan, rescan to update"
+            )
 
     def initUI(self):
         self.layout = QVBoxLayout()
@@ -96,9 +113,13 @@ class SimilarImagesTab(QWidget):
         self.layout.addLayout(action_layout)
         self.setLayout(self.layout)
 
+    @property
+    def image_files(self):
+        """Library paths, kept current by the library itself"""
+        return self.library.paths
+
     def load_images(self):
-        """Load image list from folder"""
-        self.image_files = list(get_recursive_image_files(self.image_folder))
+        """Show the library size"""
         self.update_status()
 
     def find_similar_images(self):
@@ -110,125 +131,82 @@ class SimilarImagesTab(QWidget):
             QMessageBox.critical(self, "CLIP Model Not Available", get_clip_status())
             return
 
-        clear_cache(self.image_folder, "similar")
-
         self.scanning = True
-        logging.info("Starting similar image scan")
+        self.scan_button.setEnabled(False)
 
-        # Start new scan
         total_images = len(self.image_files)
-        logging.info(f"Starting scan of {total_images} images")
         self.status_label.setText(
             f"Scanning {total_images} images. This may take a while..."
         )
 
-        spinner = LoadingSpinner(
+        self.current_index = 0
+        self.ann_recall = None
+
+        self.worker = ScanWorker(
+            scan_similar,
+            self.image_folder,
+            # Snapshots; the library keeps changing while the scan runs
+            list(self.image_files),
+            search_mode=self.search_mode,
+            grouping=self.grouping,
+            stats=dict(self.library.files),
+            parent=self,
+        )
+        self.spinner = LoadingSpinner(
             self,
             f"Scanning {total_images} images for similarities...",
             cancellable=True,
         )
-        spinner.show()
+        self.spinner.attach(self.worker)
+        self.worker.partial_result.connect(self.on_partial_groups)
+        self.worker.completed.connect(self.on_scan_completed)
+        self.worker.cancelled.connect(self.on_scan_cancelled)
+        self.worker.failed.connect(self.on_scan_failed)
+        self.worker.finished.connect(self.on_scan_finished)
+        self.spinner.show()
+        self.worker.start()
+
+    def on_partial_groups(self, groups):
+        """Show near-duplicate groups while the CLIP stage is still running"""
+        self.partial_groups = groups
+        self.display_similar_groups()
+
+    def on_scan_completed(self, result):
+        self.ann_recall = result["ann_recall"]
+        self.current_index = 0
 
-        self.similar_groups = []
-        processed = set()
-        similar_count = 0
-        batch_size = 10  # Process in smaller batches
-
-        try:
-            for i, img1 in enumerate(self.image_files):
-                if spinner.was_cancelled:
-                    logging.info("Scan cancelled by user")
-                    save_cache(self.image_folder, self.similar_groups, "similar")
-                    self.status_label.setText("Scan cancelled")
-                    break
-
-                if str(img1) in processed:
-                    continue
-
-                current_group = [img1]
-                remaining_images = self.image_files[i + 1 :]
-                total_remaining = len(remaining_images)
-                compare_index = 0
-
-                # Process remaining images in batches
-                for batch_start in range(0, total_remaining, batch_size):
-                    if spinner.was_cancelled:
-                        break
-
-                    logging.info(f"scanning image {i}")
-                    QApplication.processEvents()
-
-                    # Process batch
-                    batch_end = min(batch_start + batch_size, total_remaining)
-                    current_batch = remaining_images[batch_start:batch_end]
-
-                    for i2, img2 in enumerate(current_batch):
-                        if str(img2) in processed:
-                            continue
-                        compare_index += 1
-
-                        # Update progress
-                        progress_msg = (
-                            f"Comparing image {i+1} to {compare_index} of {total_images}\n"
-                            f"Found {len(self.similar_groups)} groups of similar images\n"
-                            f"Similar images found: {similar_count}"
-                        )
-                        spinner.progress.setLabelText(progress_msg)
-                        # Force UI update after each batch
-                        QApplication.processEvents()
-
-                        try:
-                            if are_images_similar(str(img1), str(img2), 0.91):
-                                current_group.append(img2)
-                                processed.add(str(img2))
-                                similar_count += 1
-                        except Exception as e:
-                            logging.error(f"Error comparing {img1} with {img2}: {e}")
-                            continue
-
-                if len(current_group) > 1:
-                    self.similar_groups.append(current_group)
-                    processed.add(str(img1))
-                    logging.debug(
-                        f"Found similar group with {len(current_group)} images"
-                    )
-
-            if not spinner.was_cancelled:
-                logging.info(f"Scan complete. Found {len(self.similar_groups)} groups")
-                self.similar_groups.sort(key=len, reverse=True)
-                # Save results to cache
-                cache_data = {
-                    "groups": [[str(p) for p in group] for group in self.similar_groups]
-                }
-                save_cache(self.image_folder, cache_data, "similar")
-
-        except Exception as e:
-            logging.error(f"Error during scan: {e}")
-            logging.error(traceback.format_exc())
-        finally:
-            spinner.close()
-            self.scanning = False
-            self.display_similar_groups()
-            logging.info("Scan finished")
+    def on_scan_cancelled(self):
+        logging.info("Scan cancelled by user")
+        self.status_label.setText("Scan cancelled")
+
+    def on_scan_failed(self, message):
+        QMessageBox.critical(self, "Scan Failed", message)
+
+    def on_scan_finished(self):
+        self.partial_groups = None
+        self.scanning = False
+        self.scan_button.setEnabled(True)
+        self.display_similar_groups()
+        logging.info("Scan finished")
 
     def display_similar_groups(self):
         """Display the current batch of similar image groups"""
         # Clear previous display
+        self.thumbnail_loader.reset()
         for i in reversed(range(self.grid_layout.count())):
             self.grid_layout.itemAt(i).widget().setParent(None)
 
+        self.load_page()
         if not self.similar_groups:
             no_results = QLabel("No similar images found")
             no_results.setAlignment(Qt.AlignCenter)
             self.grid_layout.addWidget(no_results, 0, 0, 1, 3)
+            self.update_status()
+            self.update_button_states()
             return
 
-        # Display current batch
-        batch_end = min(self.current_index + 3, len(self.similar_groups))
-        current_groups = self.similar_groups[self.current_index : batch_end]
-
         current_row = 0
-        for group_idx, group in enumerate(current_groups):
+        for group_idx, group in enumerate(self.similar_groups):
             # Add group header
             separator = QLabel(
                 f"Similar Group {self.current_index + group_idx + 1} ({len(group)} images)"
@@ -245,12 +223,7 @@ class SimilarImagesTab(QWidget):
                         current_row += 1
 
                     image_frame = ClickableImageLabel(self)
-                    pixmap = QPixmap(str(img_path))
-                    if pixmap.isNull():
-                        logging.error(f"Failed to load image: {img_path}")
-                        continue
-                    image_frame.setPixmap(pixmap)
-                    image_frame.image_path = img_path
+                    self.thumbnail_loader.load(image_frame, img_path)
                     self.grid_layout.addWidget(image_frame, current_row, col)
                 except Exception as e:
                     logging.error(f"Error displaying image {img_path}: {e}")
@@ -260,23 +233,41 @@ class SimilarImagesTab(QWidget):
         self.update_status()
         self.update_button_states()
 
+    def load_page(self):
+        """Fetch the counts and the groups for the current page"""
+        if self.partial_groups is not None:
+            self.group_count = len(self.partial_groups)
+            self.image_count = sum(len(group) for group in self.partial_groups)
+            self.similar_groups = self.partial_groups[
+                self.current_index : self.current_index + 3
+            ]
+            return
+
+        self.group_count = self.catalog.count_similar_groups()
+        self.image_count = self.catalog.count_similar_images()
+        self.similar_groups = self.catalog.similar_groups(
+            limit=3, offset=self.current_index
+        )
+
     def update_status(self):
         """Update the status label with current position info"""
-        if not self.similar_groups:
+        if not self.group_count:
             self.status_label.setText("No similar images found")
             return
 
-        batch_end = min(self.current_index + 3, len(self.similar_groups))
-        total_images = sum(len(group) for group in self.similar_groups)
-        self.status_label.setText(
-            f"Showing groups {self.current_index + 1}-{batch_end} of {len(self.similar_groups)} "
-            f"(Total similar images: {total_images})"
+        batch_end = min(self.current_index + 3, self.group_count)
+        status = (
+            f"Showing groups {self.current_index + 1}-{batch_end} of {self.group_count} "
+            f"(Total similar images: {self.image_count})"
         )
+        if self.ann_recall is not None:
+            status += f" - approximate search recall {self.ann_recall:.1%}"
+        self.status_label.setText(status)
 
     def update_button_states(self):
         """Update navigation button states"""
         self.prev_button.setEnabled(self.current_index > 0)
-        self.next_button.setEnabled(self.current_index + 3 < len(self.similar_groups))
+        self.next_button.setEnabled(self.current_index + 3 < self.group_count)
 
     def prev_batch(self):
         """Show previous batch of groups"""
@@ -286,7 +277,7 @@ class SimilarImagesTab(QWidget):
 
     def next_batch(self):
         """Show next batch of groups"""
-        if self.current_index + 3 < len(self.similar_groups):
+        if self.current_index + 3 < self.group_count:
             self.current_index += 3
             self.display_similar_groups()
 
@@ -295,24 +286,22 @@ class SimilarImagesTab(QWidget):
         limbo_folder = self.image_folder / "limbo"
         limbo_folder.mkdir(exist_ok=True)
 
-        moved_count = 0
+        # Collect first: every move redraws the page through the library
+        selected = []
         for i in range(self.grid_layout.count()):
             widget = self.grid_layout.itemAt(i).widget()
             if isinstance(widget, ClickableImageLabel) and widget.selected:
-                if move_to_limbo(widget.image_path, limbo_folder):
-                    moved_count += 1
+                selected.append(widget.image_path)
 
+        moved_count = sum(move_to_limbo(path, limbo_folder) for path in selected)
         if moved_count > 0:
-            # Refresh image lists and remove moved images from groups
-            self.image_files = list(get_recursive_image_files(self.image_folder))
-            # Update groups to remove moved images
-            self.similar_groups = [
-                [img for img in group if img.exists()] for group in self.similar_groups
-            ]
-            # Remove empty groups
-            self.similar_groups = [
-                group for group in self.similar_groups if len(group) > 1
-            ]
+            logging.info(f"Moved {moved_count} images to limbo")
+
+    def apply_changes(self, added, removed):
+        """Drop removed files from the results on screen"""
+        if removed:
+            self.catalog.remove_files(removed)
+        if not self.scanning:
             self.display_similar_groups()
 
     def keyPressEvent(self, event):
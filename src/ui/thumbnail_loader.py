@@ -0,0 +1,143 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+import logging
+import os
+
+from ..utils.metrics import metrics
+from ..utils.thumbnails import THUMBNAIL_SIZE, get_thumbnail_cache
+from .image_cache import ImageCache, image_cache, load_cached_image
+
+
+def load_thumbnail_image(image_path, root_folder):
+    """Decode a tile-sized QImage, preferring the on-disk thumbnail cache.
+
+    QImageReader is asked for the scaled size up front, so JPEGs are decoded
+    straight at a fraction of their resolution. Safe to call off the GUI
+    thread.
+    """
+    with metrics.stage("thumbnail.tile"):
+        thumbnail = get_thumbnail_cache(root_folder).get(image_path)
+    source = str(thumbnail if thumbnail is not None else image_path)
+    reader = QImageReader(source)
+    size = reader.size()
+    target = QSize(*THUMBNAIL_SIZE)
+    if size.isValid() and (
+        size.width() > target.width() or size.height() > target.height()
+    ):
+        size.scale(target, Qt.KeepAspectRatio)
+        reader.setScaledSize(size)
+    with metrics.stage("thumbnail.decode"):
+        image = reader.read()
+    if image.isNull():
+        logging.error(f"Failed to load image {image_path}: {reader.errorString()}")
+        return QImage()
+    metrics.add_bytes("thumbnail.read", os.path.getsize(source))
+    return image
+
+
+class _ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+
+
+class _ThumbnailTask(QRunnable):
+    def __init__(self, image_path, root_folder, signals):
+        super().__init__()
+        self.image_path = image_path
+        self.root_folder = root_folder
+        self.signals = signals
+
+    def run(self):
+        try:
+            image = load_cached_image(
+                self.image_path,
+                "thumb",
+                loader=lambda path: load_thumbnail_image(path, self.root_folder),
+            )
+        except Exception as e:
+            logging.error(f"Error loading thumbnail {self.image_path}: {e}")
+            image = QImage()
+        self.signals.loaded.emit(str(self.image_path), image)
+
+
+class ThumbnailLoader(QObject):
+    """Decodes thumbnails on a thread pool and delivers them on the GUI thread.
+
+    ``load`` fills a ClickableImageLabel, showing a placeholder straight
+    away or the thumbnail itself if it is already in the shared image
+    cache. Views that paint their own cells use ``request`` and listen to
+    ``thumbnail_ready``. The most recent requests are decoded first, so
+    whatever was scrolled to last fills in first; ``prefetch`` queues
+    images likely to be shown next behind all of them. Call ``reset`` when
+    the page changes so queued decodes for cells that are gone are dropped.
+    """
+
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, root_folder, parent=None):
+        super().__init__(parent)
+        self.root_folder = root_folder
+        self.pool = QThreadPool(self)
+        self.pending = {}
+        self.requested = set()
+        self.request_count = 0
+        self.signals = _ThumbnailSignals()
+        self.signals.loaded.connect(self.on_loaded)
+
+    def cached(self, image_path):
+        """The thumbnail if it is in the image cache, otherwise None.
+
+        Called on every repaint, so it does not count towards the cache's
+        hit rate; the decode a miss leads to is counted by the worker.
+        """
+        return image_cache.peek(ImageCache.make_key(image_path, "thumb"))
+
+    def request(self, image_path, priority=None):
+        """Queue a decode; ``thumbnail_ready`` fires when it is done"""
+        key = str(image_path)
+        if key in self.requested:
+            return
+        self.requested.add(key)
+        if priority is None:
+            self.request_count += 1
+            priority = self.request_count
+        self.pool.start(
+            _ThumbnailTask(image_path, self.root_folder, self.signals), priority
+        )
+
+    def prefetch(self, image_paths):
+        """Warm the image cache, in order, once visible cells are served"""
+        for rank, image_path in enumerate(image_paths):
+            if not image_cache.contains(ImageCache.make_key(image_path, "thumb")):
+                self.request(image_path, priority=-rank)
+
+    def load(self, image_frame, image_path):
+        image_frame.image_path = image_path
+        # Counts a hit; a miss is counted once, by the worker that decodes
+        key = ImageCache.make_key(image_path, "thumb")
+        image = image_cache.get(key) if image_cache.contains(key) else None
+        if image is not None:
+            image_frame.setPixmap(QPixmap.fromImage(image))
+            return
+
+        image_frame.show_placeholder()
+        self.pending.setdefault(str(image_path), []).append(image_frame)
+        self.request(image_path)
+
+    def on_loaded(self, key, image):
+        self.requested.discard(key)
+        for image_frame in self.pending.pop(key, []):
+            if image.isNull():
+                image_frame.show_placeholder("Unable to load image")
+            else:
+                image_frame.setPixmap(QPixmap.fromImage(image))
+        self.thumbnail_ready.emit(key, image)
+
+    def reset(self):
+        """Forget the current cells and drop decodes that have not started"""
+        self.pool.clear()
+        self.pending.clear()
+        self.requested.clear()
+
+    def shutdown(self):
+        self.reset()
+        self.pool.waitForDone()
@@ -4,29 +4,32 @@ from PyQt5.QtWidgets import (
     QHBoxLayout,
     QPushButton,
     QLabel,
-    QGridLayout,
-    QScrollArea,
     QApplication,
     QMessageBox,
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
 from pathlib import Path
 import logging
 
-from ..utils.file_ops import get_recursive_image_files, delete_trash
-from .widgets import ClickableImageLabel
+from ..utils.file_ops import delete_trash, restore_from_trash
+from ..utils.library import ImageLibrary
+from .thumbnail_loader import ThumbnailLoader
+from .image_grid import ImageGridView
 
 
 class TrashTab(QWidget):
-    def __init__(self, image_folder):
+    def __init__(self, image_folder, library=None):
         super().__init__()
         self.image_folder = Path(image_folder)
         self.trash_folder = self.image_folder / "trash"
         self.trash_folder.mkdir(exist_ok=True)
 
         self.current_index = 0
-        self.image_files = []
+        if library is None:
+            library = ImageLibrary(self.trash_folder, excluded=())
+        self.library = library
+        self.library.add_listener(self.apply_changes)
+        self.thumbnail_loader = ThumbnailLoader(self.image_folder, self)
         self.initUI()
         self.load_images()
 
@@ -38,13 +41,14 @@ class TrashTab(QWidget):
         self.status_label.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.status_label)
 
-        # Scrollable image area
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_widget = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_widget)
-        self.scroll_area.setWidget(self.scroll_widget)
-        self.layout.addWidget(self.scroll_area)
+        # Thumbnail grid, only the visible cells are loaded
+        self.image_view = ImageGridView(self.thumbnail_loader, self)
+        self.layout.addWidget(self.image_view)
+
+        # Restore button
+        self.restore_button = QPushButton("Restore Selected")
+        self.restore_button.clicked.connect(self.restore_selected)
+        self.layout.addWidget(self.restore_button)
 
         # Delete all button
         self.delete_button = QPushButton("Delete All Trash")
@@ -67,48 +71,38 @@ class TrashTab(QWidget):
 
         self.setLayout(self.layout)
 
+    @property
+    def image_files(self):
+        """Trashed paths, kept current by the trash library"""
+        return self.library.paths
+
     def load_images(self):
-        """Load images from trash folder"""
-        self.image_files = list(get_recursive_image_files(self.trash_folder))
+        """Display the trash folder"""
         self.display_images()
         self.update_status()
 
     def display_images(self):
         """Display trashed images"""
-        # Clear current display
-        for i in reversed(range(self.grid_layout.count())):
-            self.grid_layout.itemAt(i).widget().setParent(None)
-
-        if not self.image_files:
-            no_images = QLabel("Trash is empty")
-            no_images.setAlignment(Qt.AlignCenter)
-            self.grid_layout.addWidget(no_images, 0, 0)
-            return
-
-        # Display images in grid
-        for i, img_path in enumerate(self.image_files):
-            try:
-                row, col = divmod(i, 3)
-                image_frame = ClickableImageLabel(
-                    self,
-                    show_trash=False,
-                    show_restore=True,
-                    root_folder=self.image_folder,
-                )
-                pixmap = QPixmap(str(img_path))
-                if pixmap.isNull():
-                    continue
-                image_frame.setPixmap(pixmap)
-                image_frame.image_path = img_path
-                self.grid_layout.addWidget(image_frame, row, col)
-            except Exception as e:
-                logging.error(f"Error displaying image {img_path}: {e}")
+        self.image_view.set_paths(self.image_files)
 
     def update_status(self):
         """Update status label"""
         count = len(self.image_files)
+        if not count:
+            self.status_label.setText("Trash is empty")
+            return
         self.status_label.setText(f"Images in trash: {count}")
 
+    def restore_selected(self):
+        """Restore selected images to the library"""
+        restored_count = 0
+        for img_path in self.image_view.selected_paths():
+            if restore_from_trash(img_path):
+                restored_count += 1
+
+        if restored_count > 0:
+            logging.info(f"Restored {restored_count} images from trash")
+
     def delete_all(self):
         """Delete all images in trash"""
         if not self.image_files:
@@ -123,11 +117,14 @@ class TrashTab(QWidget):
         )
 
         if reply == QMessageBox.Yes:
-            if delete_trash(self.image_folder):
-                self.load_images()
+            delete_trash(self.image_folder)
+
+    def apply_changes(self, added, removed):
+        """Follow files added to or removed from the trash"""
+        self.image_view.apply_changes(added, removed)
+        self.update_status()
 
     def refresh_view(self):
         """Refresh the image display"""
-        self.load_images()
         self.display_images()
         self.update_status()
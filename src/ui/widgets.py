@@ -3,7 +3,6 @@ from PyQt5.QtWidgets import (
     QLabel,
     QVBoxLayout,
     QProgressDialog,
-    QApplication,
     QPushButton,
     QDialog,
     QWidget,
@@ -15,6 +14,7 @@ from PyQt5.QtCore import Qt, QSize
 import logging
 
 from ..utils.file_ops import move_to_trash, restore_from_trash
+from .image_cache import load_cached_image
 
 
 class ExpandedImageWindow(QDialog):
@@ -29,7 +29,7 @@ class ExpandedImageWindow(QDialog):
         layout.addWidget(self.image_label)
 
         # Load and display the image
-        self.pixmap = QPixmap(str(image_path))
+        self.pixmap = QPixmap.fromImage(load_cached_image(image_path))
         self.update_image_size()
 
     def update_image_size(self):
@@ -150,8 +150,15 @@ class ClickableImageLabel(QFrame):
             scaled_pixmap = pixmap.scaled(
                 scaled_size, Qt.KeepAspectRatio, Qt.SmoothTransformation
             )
+            self.image_label.setStyleSheet("")
             self.image_label.setPixmap(scaled_pixmap)
 
+    def show_placeholder(self, text="Loading..."):
+        """Show text in place of the image until it has been decoded"""
+        self.original_pixmap = None
+        self.image_label.setStyleSheet("color: gray;")
+        self.image_label.setText(text)
+
     def resizeEvent(self, event):
         """Handle widget resize events with high quality scaling"""
         super().resizeEvent(event)
@@ -202,6 +209,8 @@ class ClickableImageLabel(QFrame):
 
 
 class LoadingSpinner:
+    """Progress dialog that mirrors a ScanWorker's signals"""
+
     def __init__(self, parent, text="Processing...", cancellable=False):
         self.progress = QProgressDialog(
             text, "Cancel" if cancellable else None, 0, 0, parent
@@ -209,7 +218,9 @@ class LoadingSpinner:
         self.progress.setWindowModality(Qt.WindowModal)
         self.progress.setWindowTitle("Please Wait")
         self.progress.setMinimumDuration(0)
-        self.progress.setAutoClose(True)
+        # The worker decides when the scan is over, not the progress value
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
         self.progress.setMinimumWidth(400)  # Make dialog wider
 
         # Style the cancel button if present
@@ -233,23 +244,37 @@ class LoadingSpinner:
             self.progress.canceled.connect(self.handle_cancel)
 
         self.cancelled = False
+        self.worker = None
+
+    def attach(self, worker):
+        """Follow a worker's progress and close when it stops"""
+        self.worker = worker
+        worker.progress.connect(self.update_progress)
+        worker.completed.connect(self.close)
+        worker.cancelled.connect(self.close)
+        worker.failed.connect(self.close)
+
+    def update_progress(self, done, total, message):
+        """Show progress; a total of 0 shows a busy indicator"""
+        self.progress.setMaximum(total)
+        self.progress.setValue(done)
+        self.progress.setLabelText(message)
 
     def setLabelText(self, text):
         """Update the progress text"""
         self.progress.setLabelText(text)
-        QApplication.processEvents()
 
     def show(self):
         self.progress.show()
-        QApplication.processEvents()
 
-    def close(self):
+    def close(self, *args):
         self.progress.close()
 
     def handle_cancel(self):
         self.cancelled = True
         self.progress.setLabelText("Cancelling...")
-        QApplication.processEvents()
+        if self.worker is not None:
+            self.worker.cancel()
 
     @property
     def was_cancelled(self):
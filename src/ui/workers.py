@@ -0,0 +1,64 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import logging
+import threading
+import time
+import traceback
+
+
+class ScanWorker(QThread):
+    """Runs a scan engine function off the GUI thread.
+
+    The function is called with ``progress``, ``partial`` and ``cancelled``
+    keyword arguments (see ``src/utils/scanners.py``) and its callbacks are
+    turned into signals. Progress is throttled so a fast scan cannot flood
+    the event loop.
+    """
+
+    progress = pyqtSignal(int, int, str)
+    partial_result = pyqtSignal(object)
+    completed = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    PROGRESS_INTERVAL = 0.1  # seconds
+
+    def __init__(self, scan_function, *args, parent=None, **kwargs):
+        super().__init__(parent)
+        self.scan_function = scan_function
+        self.args = args
+        self.kwargs = kwargs
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+
+    def cancel(self):
+        """Ask the scan to stop at its next checkpoint"""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _report_progress(self, done, total, message):
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL or done == total:
+            self._last_progress = now
+            self.progress.emit(done, total, message)
+
+    def run(self):
+        try:
+            result = self.scan_function(
+                *self.args,
+                progress=self._report_progress,
+                partial=self.partial_result.emit,
+                cancelled=self.is_cancelled,
+                **self.kwargs,
+            )
+        except Exception as e:
+            logging.error(f"Error during scan: {e}")
+            logging.error(traceback.format_exc())
+            self.failed.emit(str(e))
+            return
+
+        if result is None or self.is_cancelled():
+            self.cancelled.emit()
+        else:
+            self.completed.emit(result)
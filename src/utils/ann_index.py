@@ -0,0 +1,290 @@
+import json
+import hashlib
+import logging
+
+import numpy as np
+
+from .cache import get_cache_dir
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+
+def get_embedding_key(image_paths, embeddings=None):
+    """Identify the set of vectors an index was built from.
+
+    Pass paths relative to the library root so the key does not depend on
+    how the folder was reached. The vectors themselves are part of the key,
+    so an image edited in place (same path, new embedding) invalidates the
+    cached index.
+    """
+    digest = hashlib.md5()
+    for image_path in image_paths:
+        digest.update(str(image_path).encode())
+        digest.update(b"\0")
+    if embeddings is not None:
+        digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _top_k(scores, k):
+    """Column indices of the ``k`` largest scores in each row, best first"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+class IVFIndex:
+    """Inverted-file index over L2-normalized vectors, pure NumPy.
+
+    Vectors are clustered with spherical k-means; a query only scores the
+    members of the ``nprobe`` clusters whose centroids are closest to it.
+    """
+
+    name = "ivf"
+    FILE_NAME = "ann_index.npz"
+
+    def __init__(self, nprobe=8):
+        self.nprobe = nprobe
+        self.centroids = None
+        self.order = None
+        self.offsets = None
+        self.key = None
+
+    def build(self, embeddings, n_iter=10, seed=0):
+        n = len(embeddings)
+        nlist = int(np.clip(np.sqrt(n), 1, 4096))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n, nlist * 40)
+        sample = embeddings[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignments == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+        assignments = self._assign(embeddings, centroids)
+        self.centroids = centroids
+        self.order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=nlist)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        logging.info(f"Built IVF index with {nlist} lists over {n} vectors")
+
+    @staticmethod
+    def _assign(embeddings, centroids, block_size=8192):
+        assignments = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), block_size):
+            block = embeddings[start : start + block_size]
+            assignments[start : start + block_size] = np.argmax(
+                block @ centroids.T, axis=1
+            )
+        return assignments
+
+    def _members(self, lists):
+        return np.concatenate(
+            [self.order[self.offsets[c] : self.offsets[c + 1]] for c in lists]
+        )
+
+    def query(self, embeddings, queries, k):
+        """Return ``(labels, scores)`` of the approximate top-k per query"""
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = _top_k(queries @ self.centroids.T, nprobe)
+
+        for q, lists in enumerate(probes):
+            candidates = self._members(lists)
+            if not len(candidates):
+                continue
+            candidate_scores = embeddings[candidates] @ queries[q]
+            top = _top_k(candidate_scores[None, :], k)[0]
+            labels[q, : len(top)] = candidates[top]
+            scores[q, : len(top)] = candidate_scores[top]
+        return labels, scores
+
+    def self_join(self, embeddings, k, progress=None):
+        """Approximate top-k neighbours for every indexed vector.
+
+        Work is done one inverted list at a time: all members of a list are
+        scored against the lists nearest its centroid in a single matmul.
+        """
+        n = len(embeddings)
+        labels = np.full((n, k), -1, dtype=np.int64)
+        scores = np.full((n, k), -np.inf, dtype=np.float32)
+        nlist = len(self.centroids)
+        nprobe = min(self.nprobe, nlist)
+        probes = _top_k(self.centroids @ self.centroids.T, nprobe)
+
+        for c in range(nlist):
+            members = self.order[self.offsets[c] : self.offsets[c + 1]]
+            if len(members):
+                candidates = self._members(probes[c])
+                block = embeddings[members] @ embeddings[candidates].T
+                top = _top_k(block, k)
+                kk = top.shape[1]
+                labels[members, :kk] = candidates[top]
+                scores[members, :kk] = np.take_along_axis(block, top, axis=1)
+            if progress is not None:
+                progress(c + 1, nlist)
+        return labels, scores
+
+    def save(self, folder_path):
+        path = get_cache_dir(folder_path) / self.FILE_NAME
+        np.savez(
+            path,
+            centroids=self.centroids,
+            order=self.order,
+            offsets=self.offsets,
+            key=np.array(self.key),
+        )
+        logging.info(f"Saved IVF index to {path}")
+
+    def load(self, folder_path):
+        path = get_cache_dir(folder_path) / self.FILE_NAME
+        if not path.exists():
+            return False
+        data = np.load(path)
+        self.centroids = data["centroids"]
+        self.order = data["order"]
+        self.offsets = data["offsets"]
+        self.key = str(data["key"])
+        return True
+
+
+class HNSWIndex:
+    """HNSW graph index backed by the optional ``hnswlib`` package"""
+
+    name = "hnsw"
+    FILE_NAME = "ann_index.hnsw"
+    META_FILE = "ann_index_hnsw.json"
+
+    def __init__(self, ef=128, M=16, ef_construction=200):
+        self.ef = ef
+        self.M = M
+        self.ef_construction = ef_construction
+        self.index = None
+        self.key = None
+
+    def build(self, embeddings):
+        n, dim = embeddings.shape
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.index.init_index(
+            max_elements=n, ef_construction=self.ef_construction, M=self.M
+        )
+        self.index.add_items(embeddings, np.arange(n))
+        logging.info(f"Built HNSW index over {n} vectors")
+
+    def query(self, embeddings, queries, k):
+        self.index.set_ef(max(self.ef, k))
+        labels, distances = self.index.knn_query(queries, k=k)
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+    def self_join(self, embeddings, k, progress=None, block_size=16384):
+        n = len(embeddings)
+        labels = np.empty((n, k), dtype=np.int64)
+        scores = np.empty((n, k), dtype=np.float32)
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            labels[start:stop], scores[start:stop] = self.query(
+                embeddings, embeddings[start:stop], k
+            )
+            if progress is not None:
+                progress(stop, n)
+        return labels, scores
+
+    def save(self, folder_path):
+        cache_dir = get_cache_dir(folder_path)
+        self.index.save_index(str(cache_dir / self.FILE_NAME))
+        with open(cache_dir / self.META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "dim": self.index.dim}, f)
+        logging.info(f"Saved HNSW index to {cache_dir / self.FILE_NAME}")
+
+    def load(self, folder_path):
+        cache_dir = get_cache_dir(folder_path)
+        index_path = cache_dir / self.FILE_NAME
+        meta_path = cache_dir / self.META_FILE
+        if not index_path.exists() or not meta_path.exists():
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.index = hnswlib.Index(space="ip", dim=meta["dim"])
+        self.index.load_index(str(index_path))
+        self.key = meta["key"]
+        return True
+
+
+def create_index(backend="auto"):
+    """Create an empty ANN index; ``auto`` prefers hnswlib when installed"""
+    if backend == "auto":
+        backend = "hnsw" if hnswlib is not None else "ivf"
+    if backend == "hnsw":
+        if hnswlib is None:
+            raise ImportError("hnswlib is not installed")
+        return HNSWIndex()
+    if backend == "ivf":
+        return IVFIndex()
+    raise ValueError(f"Unknown ANN backend: {backend}")
+
+
+def load_or_build_index(folder_path, embeddings, key, backend="auto"):
+    """Reuse the index persisted under ``.cache`` if it matches ``key``"""
+    index = create_index(backend)
+    try:
+        if index.load(folder_path) and index.key == key:
+            logging.info(f"Using cached {index.name} index")
+            return index
+    except Exception as e:
+        logging.error(f"Failed to load cached {index.name} index: {e}")
+
+    index.build(embeddings)
+    index.key = key
+    try:
+        index.save(folder_path)
+    except Exception as e:
+        logging.error(f"Failed to save {index.name} index: {e}")
+    return index
+
+
+def knn_pairs(labels, scores, threshold):
+    """Turn top-k neighbour lists into deduplicated ``(i, j, score)`` edges"""
+    rows = np.repeat(np.arange(len(labels)), labels.shape[1])
+    cols = labels.ravel()
+    values = scores.ravel()
+    keep = (cols >= 0) & (cols != rows) & (values >= threshold)
+    rows, cols, values = rows[keep], cols[keep], values[keep]
+
+    i = np.minimum(rows, cols)
+    j = np.maximum(rows, cols)
+    _, first = np.unique(i * len(labels) + j, return_index=True)
+    return [(int(i[f]), int(j[f]), float(values[f])) for f in first]
+
+
+def measure_recall(embeddings, labels, sample_size=200, seed=0):
+    """Recall@k of approximate neighbour lists against exact search.
+
+    ``labels`` are the top-k lists returned by ``self_join``; a random sample
+    of rows is checked against a brute-force top-k over all vectors.
+    """
+    n, k = labels.shape
+    if n == 0:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, min(sample_size, n), replace=False)
+
+    exact = _top_k(embeddings[sample] @ embeddings.T, k)
+    hits = sum(
+        len(set(exact[q].tolist()) & set(labels[row].tolist()))
+        for q, row in enumerate(sample)
+    )
+    recall = hits / (len(sample) * min(k, n))
+    logging.info(f"ANN recall@{k} against exact search: {recall:.3f}")
+    return recall
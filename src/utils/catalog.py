@@ -0,0 +1,301 @@
+import sqlite3
+from pathlib import Path
+
+from .cache import get_cache_dir, build_manifest, diff_manifest, get_relative_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS quality (
+    file_id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE,
+    variance REAL,
+    noise REAL,
+    scale INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quality_variance ON quality(variance);
+CREATE INDEX IF NOT EXISTS idx_quality_noise ON quality(noise);
+
+-- Reduced-scale to full-resolution Laplacian variance ratio per scale
+CREATE TABLE IF NOT EXISTS blur_calibration (
+    scale INTEGER PRIMARY KEY,
+    factor REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS hashes (
+    file_id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE,
+    dhash INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS similar_groups (
+    group_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    PRIMARY KEY (group_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_similar_groups_file ON similar_groups(file_id);
+
+-- Files covered by the last similar scan; missing rows mean it is stale
+CREATE TABLE IF NOT EXISTS similar_scanned (
+    file_id INTEGER PRIMARY KEY REFERENCES files(id) ON DELETE CASCADE
+);
+"""
+
+# Results derived from a file's contents, dropped when the file changes
+DERIVED_TABLES = ("quality", "hashes", "similar_groups", "similar_scanned")
+
+
+def _to_signed(value):
+    """SQLite integers are signed 64-bit; store uint64 hashes two's-complement"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+class Catalog:
+    """SQLite analysis catalog for a folder, stored as ``.cache/catalog.db``.
+
+    Holds the fingerprint of every library file plus the quality scores,
+    perceptual hashes and similar groups computed from it. Rows derived from
+    a file are deleted as soon as its fingerprint changes. Open one Catalog
+    per thread; WAL mode lets the GUI read while a scan writes.
+    ``cache_dir`` overrides where the database is kept.
+    """
+
+    FILE_NAME = "catalog.db"
+
+    def __init__(self, folder_path, cache_dir=None):
+        self.folder = Path(folder_path)
+        if cache_dir is None:
+            cache_dir = get_cache_dir(self.folder)
+        self.path = Path(cache_dir) / self.FILE_NAME
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _key(self, image_path):
+        return get_relative_key(self.folder, image_path)
+
+    def _path(self, key):
+        return self.folder / key
+
+    # Files
+
+    def sync_files(self, image_files, stats=None):
+        """Bring the files table in line with ``image_files``.
+
+        ``stats`` optionally maps paths to stat results so files are not
+        stat'ed again. Returns ``(added, changed, removed)`` relative paths.
+        Changed files lose their derived rows; removed files are deleted
+        with theirs.
+        """
+        manifest = build_manifest(self.folder, image_files, stats=stats)
+        stored = {
+            path: [size, mtime_ns, inode]
+            for path, size, mtime_ns, inode in self.conn.execute(
+                "SELECT path, size, mtime_ns, inode FROM files"
+            )
+        }
+        added, changed, removed = diff_manifest(stored, manifest)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO files (path, size, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+                ([key] + manifest[key] for key in added),
+            )
+            for table in DERIVED_TABLES:
+                self.conn.executemany(
+                    f"DELETE FROM {table} WHERE file_id = "
+                    "(SELECT id FROM files WHERE path = ?)",
+                    ([key] for key in changed),
+                )
+            self.conn.executemany(
+                "UPDATE files SET size = ?, mtime_ns = ?, inode = ? WHERE path = ?",
+                (manifest[key] + [key] for key in changed),
+            )
+            self.conn.executemany(
+                "DELETE FROM files WHERE path = ?", ([key] for key in removed)
+            )
+        return added, changed, removed
+
+    def remove_files(self, image_paths):
+        """Forget files that were moved out of the library"""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM files WHERE path = ?",
+                ([self._key(p)] for p in image_paths),
+            )
+
+    def count_files(self):
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    # Quality scores
+
+    def paths_missing_quality(self, scale=1):
+        """Files without quality scores at ``scale``"""
+        rows = self.conn.execute(
+            "SELECT f.path FROM files f LEFT JOIN quality q ON q.file_id = f.id "
+            "WHERE q.file_id IS NULL OR q.scale != ? ORDER BY f.id",
+            (scale,),
+        )
+        return [self._path(path) for (path,) in rows]
+
+    def save_quality(self, scores, scale=1):
+        """Store ``{path: (variance, noise) or None}`` in one transaction"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO quality (file_id, variance, noise, scale) "
+                "SELECT id, ?, ?, ? FROM files WHERE path = ?",
+                (
+                    (None, None, scale, self._key(p))
+                    if s is None
+                    else (s[0], s[1], scale, self._key(p))
+                    for p, s in scores.items()
+                ),
+            )
+
+    def clear_quality(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM quality")
+            self.conn.execute("DELETE FROM blur_calibration")
+
+    def load_blur_factor(self, scale):
+        """Stored blur calibration for ``scale``, or None"""
+        row = self.conn.execute(
+            "SELECT factor FROM blur_calibration WHERE scale = ?", (scale,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def save_blur_factor(self, scale, factor):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO blur_calibration (scale, factor) "
+                "VALUES (?, ?)",
+                (scale, factor),
+            )
+
+    _BAD_QUALITY = "q.variance IS NULL OR q.variance < ? OR q.noise > ?"
+
+    def count_bad_images(self, blur_threshold, noise_threshold):
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM quality q WHERE {self._BAD_QUALITY}",
+            (blur_threshold, noise_threshold),
+        ).fetchone()[0]
+
+    def bad_images(self, blur_threshold, noise_threshold, limit=-1, offset=0):
+        """Page through images failing the thresholds, worst first"""
+        rows = self.conn.execute(
+            "SELECT f.path FROM quality q JOIN files f ON f.id = q.file_id "
+            f"WHERE {self._BAD_QUALITY} "
+            "ORDER BY q.variance IS NOT NULL, q.variance, f.id LIMIT ? OFFSET ?",
+            (blur_threshold, noise_threshold, limit, offset),
+        )
+        return [self._path(path) for (path,) in rows]
+
+    # Perceptual hashes
+
+    def load_hashes(self):
+        """Return ``{path: dhash}`` for every hashed file"""
+        rows = self.conn.execute(
+            "SELECT f.path, h.dhash FROM hashes h JOIN files f ON f.id = h.file_id"
+        )
+        return {self._path(path): _to_unsigned(dhash) for path, dhash in rows}
+
+    def save_hashes(self, hashes):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hashes (file_id, dhash) "
+                "SELECT id, ? FROM files WHERE path = ?",
+                ((_to_signed(h), self._key(p)) for p, h in hashes.items()),
+            )
+
+    # Similar groups
+
+    def save_similar_groups(self, groups):
+        """Replace all similar groups; every file now counts as scanned"""
+        with self.conn:
+            self.conn.execute("DELETE FROM similar_groups")
+            self.conn.execute("DELETE FROM similar_scanned")
+            self.conn.executemany(
+                "INSERT INTO similar_groups (group_id, position, file_id) "
+                "SELECT ?, ?, id FROM files WHERE path = ?",
+                (
+                    (group_id, position, self._key(p))
+                    for group_id, group in enumerate(groups)
+                    for position, p in enumerate(group)
+                ),
+            )
+            self.conn.execute(
+                "INSERT INTO similar_scanned (file_id) SELECT id FROM files"
+            )
+
+    _VALID_GROUPS = (
+        "SELECT group_id, COUNT(*) AS size FROM similar_groups "
+        "GROUP BY group_id HAVING size > 1"
+    )
+
+    def count_similar_groups(self):
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM ({self._VALID_GROUPS})"
+        ).fetchone()[0]
+
+    def count_similar_images(self):
+        return self.conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM ({self._VALID_GROUPS})"
+        ).fetchone()[0]
+
+    def similar_groups(self, limit=-1, offset=0):
+        """Page through groups that still have at least two files, largest first"""
+        group_ids = [
+            group_id
+            for (group_id, _) in self.conn.execute(
+                f"{self._VALID_GROUPS} ORDER BY size DESC, group_id LIMIT ? OFFSET ?",
+                (limit, offset),
+            )
+        ]
+        if not group_ids:
+            return []
+
+        members = {group_id: [] for group_id in group_ids}
+        placeholders = ",".join("?" * len(group_ids))
+        rows = self.conn.execute(
+            "SELECT g.group_id, f.path FROM similar_groups g "
+            "JOIN files f ON f.id = g.file_id "
+            f"WHERE g.group_id IN ({placeholders}) ORDER BY g.group_id, g.position",
+            group_ids,
+        )
+        for group_id, path in rows:
+            members[group_id].append(self._path(path))
+        return [members[group_id] for group_id in group_ids]
+
+    def has_similar_scan(self):
+        row = self.conn.execute("SELECT EXISTS (SELECT 1 FROM similar_scanned)")
+        return row.fetchone()[0] == 1
+
+    def similar_scan_is_stale(self):
+        """True when files were added or changed since the last similar scan"""
+        if not self.has_similar_scan():
+            return False
+        row = self.conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM files f LEFT JOIN similar_scanned s "
+            "ON s.file_id = f.id WHERE s.file_id IS NULL)"
+        )
+        return row.fetchone()[0] == 1
@@ -0,0 +1,242 @@
+import json
+import os
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from .cache import get_cache_dir, get_relative_key
+from .encoders import describe_backend
+from .metrics import metrics
+
+
+class EmbeddingStore:
+    """On-disk CLIP embedding store for a folder.
+
+    Vectors live in a memory-mapped float32 matrix (``embeddings.f32``) and
+    are looked up through a JSON index mapping each image's path, relative
+    to the library root, to its row, mtime and size. Relative keys keep the
+    store valid however the folder is reached (``.``, an absolute path or
+    another mount). An entry is only reused while the file's mtime and size
+    are unchanged, so edited images are re-encoded automatically.
+
+    ``encoder`` is the ``{"backend", "quantize"}`` that will fill the store.
+    Vectors from another backend or precision differ enough to shift
+    similarity scores, so a store made by a different encoder is emptied
+    rather than mixed. ``cache_dir`` overrides where the files are kept,
+    which defaults to the library's ``.cache``.
+    """
+
+    MATRIX_FILE = "embeddings.f32"
+    INDEX_FILE = "embeddings_index.json"
+    GROWTH_ROWS = 1024
+    # Every store written before the encoder was recorded came from PyTorch
+    DEFAULT_ENCODER = {"backend": "torch", "quantize": False}
+
+    def __init__(self, folder_path, cache_dir=None, encoder=None):
+        self.folder = Path(folder_path)
+        self.encoder = encoder
+        if cache_dir is None:
+            cache_dir = get_cache_dir(self.folder)
+        cache_dir = Path(cache_dir)
+        self.matrix_path = cache_dir / self.MATRIX_FILE
+        self.index_path = cache_dir / self.INDEX_FILE
+        self.dim = None
+        self.capacity = 0
+        self.entries = {}
+        self.free_rows = []
+        self.next_row = 0
+        self._matrix = None
+        self._dirty = False
+        with metrics.stage("embedding_store.load"):
+            self._load()
+
+    def _load(self):
+        """Load the index and map the matrix file if present"""
+        if not self.index_path.exists() or not self.matrix_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.next_row = index["next_row"]
+            self.free_rows = index.get("free_rows", [])
+            self.entries = index["entries"]
+            if index.get("keys") != "relative":
+                self.entries = self._relative_entries(self.entries)
+            stored_encoder = index.get("encoder", self.DEFAULT_ENCODER)
+            if self.encoder is None:
+                self.encoder = stored_encoder
+            elif stored_encoder != self.encoder:
+                logging.info(
+                    f"Embeddings were made by {describe_backend(**stored_encoder)}, "
+                    f"re-encoding with {describe_backend(**self.encoder)}"
+                )
+                self.entries = {}
+                self.free_rows = []
+                self.next_row = 0
+                self._dirty = True
+            self.capacity = self.matrix_path.stat().st_size // (4 * self.dim)
+            if self.capacity < self.next_row:
+                raise ValueError("embedding matrix is smaller than its index")
+            self._map()
+            logging.info(f"Loaded {len(self.entries)} cached embeddings")
+        except Exception as e:
+            logging.error(f"Failed to load embedding store, starting fresh: {e}")
+            self.dim = None
+            self.capacity = 0
+            self.entries = {}
+            self.free_rows = []
+            self.next_row = 0
+            self._matrix = None
+
+    def _relative_entries(self, entries):
+        """Rekey an index saved under full paths by older versions"""
+        relative = {}
+        for key, entry in entries.items():
+            try:
+                relative[get_relative_key(self.folder, key)] = entry
+            except ValueError:
+                # Saved through another path to the folder; re-encoded later
+                self.free_rows.append(entry["row"])
+        self._dirty = True
+        return relative
+
+    def _map(self):
+        if self.capacity == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self.matrix_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(self.capacity, self.dim),
+        )
+
+    def _grow(self, min_rows):
+        """Extend the matrix file so it holds at least ``min_rows`` rows"""
+        new_capacity = max(min_rows, self.capacity + self.GROWTH_ROWS)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.capacity = new_capacity
+        self._map()
+
+    def _key(self, image_path):
+        return get_relative_key(self.folder, image_path)
+
+    @staticmethod
+    def _fingerprint(image_path, stat=None):
+        if stat is None:
+            stat = os.stat(image_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, image_path, stat=None):
+        """Return the cached vector for an unchanged file, or None"""
+        entry = self.entries.get(self._key(image_path))
+        if entry is None or self._matrix is None:
+            return None
+        try:
+            mtime, size = self._fingerprint(image_path, stat)
+        except OSError:
+            return None
+        if entry["mtime"] != mtime or entry["size"] != size:
+            return None
+        return np.array(self._matrix[entry["row"]])
+
+    def put(self, image_path, embedding, stat=None):
+        """Store the vector for a file, reusing its row if it had one"""
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        if self.dim is None:
+            self.dim = vector.shape[0]
+        if vector.shape[0] != self.dim:
+            logging.error(
+                f"Embedding for {image_path} has dimension {vector.shape[0]}, "
+                f"expected {self.dim}"
+            )
+            return False
+
+        try:
+            mtime, size = self._fingerprint(image_path, stat)
+        except OSError as e:
+            logging.error(f"Cannot stat {image_path}: {e}")
+            return False
+
+        key = self._key(image_path)
+        entry = self.entries.get(key)
+        if entry is not None:
+            row = entry["row"]
+        elif self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = self.next_row
+            self.next_row += 1
+            if row >= self.capacity:
+                self._grow(row + 1)
+
+        self._matrix[row] = vector
+        self.entries[key] = {"row": row, "mtime": mtime, "size": size}
+        self._dirty = True
+        return True
+
+    def stack(self, image_paths):
+        """Return ``(matrix, indices)`` for the paths with up-to-date vectors.
+
+        ``indices`` maps each matrix row back to its position in
+        ``image_paths``; images without a usable embedding are skipped.
+        """
+        vectors = []
+        indices = []
+        for i, image_path in enumerate(image_paths):
+            vector = self.get(image_path)
+            if vector is not None:
+                vectors.append(vector)
+                indices.append(i)
+        if not vectors:
+            return np.zeros((0, self.dim or 0), dtype=np.float32), indices
+        return np.vstack(vectors), indices
+
+    def prune(self, valid_paths):
+        """Drop entries for files that are no longer in the library"""
+        valid = {self._key(p) for p in valid_paths}
+        stale = [key for key in self.entries if key not in valid]
+        for key in stale:
+            self.free_rows.append(self.entries.pop(key)["row"])
+        if stale:
+            self._dirty = True
+            logging.info(f"Pruned {len(stale)} stale embeddings")
+
+    def save(self):
+        """Flush the matrix and atomically rewrite the index"""
+        if not self._dirty:
+            return True
+        try:
+            with metrics.stage("embedding_store.save"):
+                if self._matrix is not None:
+                    self._matrix.flush()
+                index = {
+                    "dim": self.dim,
+                    "keys": "relative",
+                    "encoder": self.encoder,
+                    "next_row": self.next_row,
+                    "free_rows": self.free_rows,
+                    "entries": self.entries,
+                }
+                tmp_path = self.index_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self.index_path)
+            self._dirty = False
+            logging.info(f"Saved {len(self.entries)} embeddings to {self.matrix_path}")
+            return True
+        except Exception as e:
+            logging.error(f"Failed to save embedding store: {e}")
+            return False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, image_path):
+        return self._key(image_path) in self.entries
@@ -0,0 +1,218 @@
+"""Inference backends for the CLIP image tower.
+
+Every encoder is called with a preprocessed ``[B, 3, 224, 224]`` tensor and
+returns a float32 ``[B, D]`` array:
+
+- ``torch`` runs ``model.encode_image`` as is (GPU if available).
+- ``torchscript`` traces and freezes the image tower for the CPU.
+- ``onnx`` exports it to ONNX and runs it with ONNX Runtime on the CPU.
+
+The exported backends can apply dynamic int8 quantization to the linear
+layers, which hold most of the ViT's weights and compute. Exports happen
+once and are cached per user under ``image-manager/encoders``; later runs
+load the artifact directly. ``image_processing.validate_encoder`` measures
+how closely a backend's embeddings agree with fp32 PyTorch.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# torch and onnxruntime are imported where they are used, like the model
+# itself, so picking a backend costs nothing until CLIP is loaded
+ENCODER_BACKENDS = ("torch", "torchscript", "onnx")
+MODEL_NAME = "ViT-B/32"
+INPUT_RESOLUTION = 224
+ONNX_OPSET = 17
+
+
+def get_artifact_dir():
+    """Per-user folder for exported encoders, shared by every library"""
+    root = os.environ.get("IMAGE_MANAGER_MODEL_CACHE")
+    if root is None:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        root = Path(base) / "image-manager" / "encoders"
+    directory = Path(root)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def get_artifact_path(backend, quantize):
+    """Artifact file for a backend; the name changes with torch's version"""
+    import torch
+
+    key = f"{MODEL_NAME}|{torch.__version__}|{backend}|{quantize}|{ONNX_OPSET}"
+    digest = hashlib.md5(key.encode()).hexdigest()[:12]
+    slug = MODEL_NAME.lower().replace("/", "").replace("-", "")
+    precision = "int8" if quantize else "fp32"
+    extension = "onnx" if backend == "onnx" else "pt"
+    return get_artifact_dir() / f"clip-{slug}-{precision}-{digest}.{extension}"
+
+
+def describe_backend(backend, quantize):
+    names = {"torch": "PyTorch", "torchscript": "TorchScript", "onnx": "ONNX Runtime"}
+    return f"{names[backend]} {'int8' if quantize else 'fp32'}"
+
+
+class TorchEncoder:
+    """``model.encode_image`` on the model's own device and precision"""
+
+    name = "torch"
+    quantize = False
+
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+
+    def __call__(self, pixels):
+        import torch
+
+        with torch.no_grad():
+            embeddings = self.model.encode_image(pixels.to(self.device))
+        return embeddings.float().cpu().numpy()
+
+
+class TorchScriptEncoder:
+    """Traced, frozen image tower on the CPU"""
+
+    name = "torchscript"
+
+    def __init__(self, module, quantize):
+        self.module = module
+        self.quantize = quantize
+
+    @classmethod
+    def load(cls, model, quantize):
+        import torch
+
+        path = get_artifact_path("torchscript", quantize)
+        if not path.exists():
+            visual = _cpu_image_tower(model, quantize)
+            example = torch.zeros(2, 3, INPUT_RESOLUTION, INPUT_RESOLUTION)
+            with torch.no_grad():
+                traced = torch.jit.freeze(torch.jit.trace(visual, example).eval())
+            tmp_path = path.with_suffix(".tmp")
+            torch.jit.save(traced, str(tmp_path))
+            os.replace(tmp_path, path)
+            logging.info(f"Exported TorchScript image encoder to {path}")
+        return cls(torch.jit.load(str(path), map_location="cpu"), quantize)
+
+    def __call__(self, pixels):
+        import torch
+
+        with torch.no_grad():
+            return self.module(pixels.cpu().float()).float().numpy()
+
+
+class OnnxEncoder:
+    """Image tower exported to ONNX, run by ONNX Runtime on the CPU"""
+
+    name = "onnx"
+
+    def __init__(self, session, quantize):
+        self.session = session
+        self.quantize = quantize
+        self.input_name = session.get_inputs()[0].name
+
+    @classmethod
+    def load(cls, model, quantize):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("onnxruntime is not installed")
+        path = get_artifact_path("onnx", quantize)
+        if not path.exists():
+            fp32_path = get_artifact_path("onnx", False)
+            if not fp32_path.exists():
+                _export_onnx(model, fp32_path)
+            if quantize:
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+
+                tmp_path = path.with_suffix(".tmp")
+                quantize_dynamic(
+                    str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8
+                )
+                os.replace(tmp_path, path)
+                logging.info(f"Quantized ONNX image encoder to {path}")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        session = onnxruntime.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        return cls(session, quantize)
+
+    def __call__(self, pixels):
+        array = np.ascontiguousarray(pixels.cpu().float().numpy())
+        return self.session.run(None, {self.input_name: array})[0].astype(np.float32)
+
+
+def _cpu_image_tower(model, quantize):
+    """fp32 copy of ``model.visual`` on the CPU, int8 linears if asked"""
+    import copy
+    import torch
+
+    visual = copy.deepcopy(model.visual).float().cpu().eval()
+    if quantize:
+        visual = torch.ao.quantization.quantize_dynamic(
+            visual, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return visual
+
+
+def _export_onnx(model, path):
+    import torch
+
+    visual = _cpu_image_tower(model, quantize=False)
+    example = torch.zeros(2, 3, INPUT_RESOLUTION, INPUT_RESOLUTION)
+    tmp_path = path.with_suffix(".tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            visual,
+            example,
+            str(tmp_path),
+            input_names=["pixels"],
+            output_names=["embeddings"],
+            dynamic_axes={"pixels": {0: "batch"}, "embeddings": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+        )
+    os.replace(tmp_path, path)
+    logging.info(f"Exported ONNX image encoder to {path}")
+
+
+def create_encoder(model, device, backend="torch", quantize=False):
+    """Build the encoder for ``backend``, falling back to plain PyTorch"""
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}")
+    if backend == "torch":
+        if quantize:
+            logging.warning("int8 quantization needs the torchscript or onnx backend")
+        return TorchEncoder(model, device)
+
+    loader = TorchScriptEncoder if backend == "torchscript" else OnnxEncoder
+    try:
+        start = time.perf_counter()
+        encoder = loader.load(model, quantize)
+        logging.info(
+            f"Loaded {describe_backend(backend, quantize)} image encoder "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return encoder
+    except Exception as e:
+        logging.error(
+            f"Cannot use the {backend} encoder, falling back to PyTorch: {e}"
+        )
+        return TorchEncoder(model, device)
+
+
+def cosine_agreement(reference, candidate):
+    """Row-wise cosine similarity between two ``[N, D]`` embedding arrays"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return np.sum(reference * candidate, axis=1)
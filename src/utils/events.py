@@ -0,0 +1,40 @@
+"""Process-wide publish/subscribe for changes to library files.
+
+``file_ops`` publishes an event for every file it moves or deletes, so
+anything tracking the library can update itself without walking the
+folder again. Callbacks run synchronously on the publishing thread.
+"""
+
+import logging
+import threading
+
+# Payload: source, destination
+FILE_MOVED = "file_moved"
+# Payload: path
+FILE_DELETED = "file_deleted"
+
+_subscribers = {}
+_lock = threading.Lock()
+
+
+def subscribe(event, callback):
+    with _lock:
+        _subscribers.setdefault(event, []).append(callback)
+
+
+def unsubscribe(event, callback):
+    with _lock:
+        callbacks = _subscribers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+
+def publish(event, **payload):
+    """Call every subscriber of ``event`` with ``payload`` as keyword arguments"""
+    with _lock:
+        callbacks = list(_subscribers.get(event, ()))
+    for callback in callbacks:
+        try:
+            callback(**payload)
+        except Exception as e:
+            logging.error(f"Error handling {event} event: {e}")
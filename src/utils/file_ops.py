@@ -1,22 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
+import bisect
 import logging
+import os
 
+from . import events
+from .metrics import metrics
 
-def get_recursive_image_files(image_folder):
-    """Get all image files recursively, excluding the keep folder"""
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+# Folders at the library root that hold files outside the library
+EXCLUDED_FOLDERS = {"keep", "trash", "limbo", ".cache"}
+
+
+def list_directory(directory, excluded=()):
+    """List one directory without descending into it.
+
+    Returns ``(files, subdirectories, mtime_ns)``: ``(path, stat)`` pairs
+    for the images in it, the paths of its subdirectories minus
+    ``excluded`` names, and the directory's own mtime (None if it is gone).
+    Subdirectories are given as ``str(Path(...))``, the same form as
+    ``str(image_path.parent)``, so ``./a`` comes back as ``a``.
+    """
+    files = []
+    subdirectories = []
     try:
-        keep_folder = Path(image_folder) / "keep"
-        image_files = [
-            img
-            for ext in ["*.jpg", "*.jpeg", "*.png", "*.webp"]
-            for img in Path(image_folder).rglob(ext)
-            if keep_folder not in img.parents
-        ]
-        logging.info(f"Found {len(image_files)} images in {image_folder}")
-        return image_files
-    except Exception as e:
-        logging.error(f"Error getting image files: {e}")
-        return []
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with metrics.stage("walk.list_directory"), os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in excluded:
+                            subdirectories.append(str(Path(entry.path)))
+                    elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                        files.append((entry.path, entry.stat()))
+                except OSError as e:
+                    logging.error(f"Error reading {entry.path}: {e}")
+    except OSError as e:
+        logging.error(f"Error scanning {directory}: {e}")
+        return [], [], None
+    return files, subdirectories, mtime_ns
+
+
+def scan_library(image_folder, num_workers=1, excluded=EXCLUDED_FOLDERS):
+    """Walk a folder once, returning ``(files, directories)``.
+
+    ``files`` maps every image path to its stat result, sorted by path;
+    ``directories`` maps each directory visited to its mtime. Extensions
+    match case-insensitively and ``excluded`` folders at the top level are
+    skipped without being entered. With ``num_workers`` > 1 directories
+    are listed on a thread pool, which hides latency on network mounts.
+    """
+    with metrics.stage("walk"):
+        found, directories = _walk(str(Path(image_folder)), num_workers, excluded)
+    metrics.count("walk.files", len(found))
+    metrics.count("walk.directories", len(directories))
+
+    files = {Path(path): stat for path, stat in found}
+    logging.info(f"Found {len(files)} images in {image_folder}")
+    return {path: files[path] for path in sorted(files)}, directories
+
+
+def _walk(root, num_workers, excluded):
+    found = []
+    directories = {}
+
+    def visit(directory, result):
+        files, subdirectories, mtime_ns = result
+        found.extend(files)
+        if mtime_ns is not None:
+            directories[directory] = mtime_ns
+        return subdirectories
+
+    if num_workers <= 1:
+        stack = [(root, excluded)]
+        while stack:
+            directory, skip = stack.pop()
+            subdirectories = visit(directory, list_directory(directory, skip))
+            stack.extend((d, ()) for d in subdirectories)
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as pool:
+            pending = {pool.submit(list_directory, root, excluded): root}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    subdirectories = visit(pending.pop(future), future.result())
+                    for d in subdirectories:
+                        pending[pool.submit(list_directory, d)] = d
+    return found, directories
+
+
+def scan_image_files(image_folder, num_workers=1):
+    """Find every image under a folder in one pass, with its stat result.
+
+    The keep, trash, limbo and .cache folders at the top level are skipped.
+    Returns ``{path: stat}`` sorted by path.
+    """
+    return scan_library(image_folder, num_workers)[0]
+
+
+def get_recursive_image_files(image_folder, num_workers=1):
+    """Get all image files recursively, excluding keep, trash and limbo"""
+    return list(scan_image_files(image_folder, num_workers))
+
+
+def apply_file_changes(image_files, added=(), removed=()):
+    """Return the sorted ``image_files`` list with paths added and removed"""
+    removed = set(removed)
+    result = [p for p in image_files if p not in removed]
+    for path in sorted(added):
+        i = bisect.bisect_left(result, path)
+        if i == len(result) or result[i] != path:
+            result.insert(i, path)
+    return result
 
 
 def move_to_keep(image_path, keep_folder):
@@ -30,12 +125,31 @@ def move_to_keep(image_path, keep_folder):
             counter += 1
         source.rename(destination)
         logging.info(f"Moved {source} to keep: {destination}")
+        events.publish(events.FILE_MOVED, source=source, destination=destination)
         return True
     except Exception as e:
         logging.error(f"Error moving file to keep: {e}")
         return False
 
 
+def move_to_limbo(image_path, limbo_folder):
+    """Move a file to the limbo folder, handling name conflicts"""
+    try:
+        source = Path(image_path)
+        destination = limbo_folder / source.name
+        counter = 1
+        while destination.exists():
+            destination = limbo_folder / f"{source.stem}_{counter}{source.suffix}"
+            counter += 1
+        source.rename(destination)
+        logging.info(f"Moved {source} to limbo: {destination}")
+        events.publish(events.FILE_MOVED, source=source, destination=destination)
+        return True
+    except Exception as e:
+        logging.error(f"Error moving file to limbo: {e}")
+        return False
+
+
 def restore_from_keep(source, main_folder):
     """Restore a file from keep to main folder"""
     try:
@@ -46,6 +160,7 @@ def restore_from_keep(source, main_folder):
             counter += 1
         source.rename(destination)
         logging.info(f"Restored {source} to {destination}")
+        events.publish(events.FILE_MOVED, source=source, destination=destination)
         return True
     except Exception as e:
         logging.error(f"Error restoring file from keep: {e}")
@@ -79,6 +194,7 @@ def move_to_trash(image_path, root_folder=None):
         source.rename(destination)
         if destination.exists() and not source.exists():
             logging.info(f"Moved {source.name} to trash ({destination})")
+            events.publish(events.FILE_MOVED, source=source, destination=destination)
             return True
         else:
             logging.error(f"Failed to move {source.name} to trash")
@@ -107,6 +223,7 @@ def restore_from_trash(image_path):
         # Actually move the file
         source.rename(destination)
         logging.info(f"Restored {source.name} from trash to ({destination})")
+        events.publish(events.FILE_MOVED, source=source, destination=destination)
         return True
     except Exception as e:
         logging.error(f"Error restoring file from trash: {e}")
@@ -124,6 +241,7 @@ def delete_trash(folder_path):
             if file.is_file():
                 file.unlink()
                 logging.info(f"Deleted {file}")
+                events.publish(events.FILE_DELETED, path=file)
 
         return True
     except Exception as e:
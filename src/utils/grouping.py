@@ -0,0 +1,138 @@
+import logging
+
+
+class UnionFind:
+    """Disjoint-set forest over integer ids with path halving and union by size"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        """Merge the sets containing ``a`` and ``b``; returns the new root"""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        return ra
+
+    def groups(self, min_size=2):
+        """Return every set with at least ``min_size`` members"""
+        members = {}
+        for x in range(len(self.parent)):
+            members.setdefault(self.find(x), []).append(x)
+        return [group for group in members.values() if len(group) >= min_size]
+
+
+def _connected_components(uf, edges):
+    for i, j, _ in edges:
+        uf.union(i, j)
+
+
+def _complete_link(uf, edges):
+    """Merge two groups only once every pair across them has an edge.
+
+    Edges are visited strongest first. ``links[a][b]`` counts the edges seen
+    between the groups rooted at ``a`` and ``b``; when it reaches
+    ``size[a] * size[b]`` the groups form a clique and are merged.
+    """
+    links = {}
+    for i, j, _ in sorted(edges, key=lambda e: (-e[2], e[0], e[1])):
+        ra, rb = uf.find(i), uf.find(j)
+        if ra == rb:
+            continue
+        count = links.setdefault(ra, {}).get(rb, 0) + 1
+        links[ra][rb] = count
+        links.setdefault(rb, {})[ra] = count
+        if count < uf.size[ra] * uf.size[rb]:
+            continue
+
+        root = uf.union(ra, rb)
+        other = rb if root == ra else ra
+        root_links = links.setdefault(root, {})
+        root_links.pop(other, None)
+        for neighbour, n_links in links.pop(other, {}).items():
+            if neighbour == root:
+                continue
+            neighbour_links = links[neighbour]
+            del neighbour_links[other]
+            merged = root_links.get(neighbour, 0) + n_links
+            root_links[neighbour] = merged
+            neighbour_links[root] = merged
+
+
+GROUPING_METHODS = {
+    "connected": _connected_components,
+    "complete": _complete_link,
+}
+
+
+def distance_edges(edges, max_distance):
+    """Turn ``(i, j, distance)`` edges into scores where closer is higher.
+
+    ``group_edges`` treats the third element as a similarity, so distances
+    such as Hamming bits must be flipped before grouping.
+    """
+    for i, j, distance in edges:
+        yield i, j, max_distance - distance
+
+
+def group_edges(n, edges, method="connected", threshold=None):
+    """Group ids ``0..n-1`` from a stream of ``(i, j, score)`` similarity edges.
+
+    ``connected`` puts any chain of similar images in one group;
+    ``complete`` only groups images that are all similar to each other.
+    Edges scoring below ``threshold`` are ignored. Groups are returned as
+    sorted id lists, largest first, independent of the order edges arrive in.
+    """
+    if method not in GROUPING_METHODS:
+        raise ValueError(f"Unknown grouping method: {method}")
+
+    # Keep the strongest score per unordered pair
+    best = {}
+    for i, j, score in edges:
+        if i == j or (threshold is not None and score < threshold):
+            continue
+        key = (i, j) if i < j else (j, i)
+        if score > best.get(key, float("-inf")):
+            best[key] = score
+    edges = [(i, j, score) for (i, j), score in best.items()]
+
+    uf = UnionFind(n)
+    GROUPING_METHODS[method](uf, edges)
+
+    groups = [sorted(group) for group in uf.groups()]
+    groups.sort(key=lambda g: (-len(g), g[0]))
+    logging.info(f"Grouped {len(edges)} edges into {len(groups)} groups ({method})")
+    return groups
+
+
+def expand_groups(groups, duplicate_groups):
+    """Merge near-duplicate sets back into groups found on their representatives.
+
+    Each duplicate set is represented by its first id; every group containing
+    a representative gains the rest of that set. Duplicate sets that matched
+    nothing else become groups of their own.
+    """
+    members = {group[0]: group for group in duplicate_groups}
+    used = set()
+    expanded = []
+    for group in groups:
+        merged = []
+        for i in group:
+            merged.extend(members.get(i, [i]))
+            used.add(i)
+        expanded.append(sorted(merged))
+    expanded.extend(group for rep, group in members.items() if rep not in used)
+    expanded.sort(key=lambda g: (-len(g), g[0]))
+    return expanded
@@ -1,76 +1,281 @@
 import cv2
 import numpy as np
-import torch
 from PIL import Image
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import traceback
 
-try:
-    import clip
-except ImportError:
-    clip = None
+from .quality import BLUR_THRESHOLD, NOISE_THRESHOLD, laplacian_variance, noise_level
+from .metrics import metrics
+from .encoders import (
+    ENCODER_BACKENDS,
+    MODEL_NAME,
+    TorchEncoder,
+    create_encoder,
+    cosine_agreement,
+    describe_backend,
+)
 
-# Initialize CLIP model with error handling
-try:
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model, preprocess = clip.load("ViT-B/32", device=device)
-    if device == "cpu":
-        logging.info("Running CLIP on CPU - this will be slower but still functional")
-except Exception as e:
-    logging.error(f"Error loading CLIP model: {e}")
-    model = None
-    preprocess = None
+# torch and CLIP take seconds to import and load, so both wait until the
+# model is first needed (or warm_up_model is called)
+model = None
+preprocess = None
+device = None
+# Runs the image tower; see set_encoder_backend
+encoder = None
+_encoder_backend = "torch"
+_encoder_quantize = False
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def set_encoder_backend(backend="torch", quantize=False):
+    """Choose how images are encoded: ``torch``, ``torchscript`` or ``onnx``.
+
+    ``quantize`` applies dynamic int8 quantization to the exported backends.
+    Takes effect when the model is loaded, so call it before first use.
+    """
+    global _encoder_backend, _encoder_quantize
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend}")
+    if _model_loaded:
+        logging.warning("CLIP is already loaded, the encoder backend is unchanged")
+        return
+    _encoder_backend = backend
+    _encoder_quantize = quantize
+
+
+def load_model():
+    """Load CLIP on first use; returns ``(model, preprocess, device)``.
+
+    Safe to call from any thread. If loading fails, the model stays None
+    and later calls return straight away.
+    """
+    global model, preprocess, device, encoder, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            try:
+                import torch
+                import clip
+
+                # The exported backends are CPU-only
+                use_cuda = torch.cuda.is_available() and _encoder_backend == "torch"
+                device = "cuda" if use_cuda else "cpu"
+                if device == "cuda":
+                    logging.info(f"CUDA device: {torch.cuda.get_device_name(0)}")
+                model, preprocess = clip.load(MODEL_NAME, device=device)
+                encoder = create_encoder(
+                    model, device, _encoder_backend, _encoder_quantize
+                )
+                if device == "cpu" and encoder.name == "torch":
+                    logging.info(
+                        "Running CLIP on CPU - this will be slower but still functional"
+                    )
+            except Exception as e:
+                logging.error(f"Error loading CLIP model: {e}")
+                model = None
+                preprocess = None
+                encoder = None
+    return model, preprocess, device
+
+
+def warm_up_model():
+    """Start loading CLIP on a background thread"""
+    thread = threading.Thread(target=load_model, name="clip-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def release_model_memory():
+    """Free cached GPU memory, if the model was loaded on a GPU"""
+    if device == "cuda":
+        import torch
+
+        torch.cuda.empty_cache()
 
 
 def get_image_embedding(image_path):
     try:
+        model, preprocess, device = load_model()
         if model is None or preprocess is None:
             logging.error("CLIP model not initialized")
             return None
+        import torch
 
-        image = preprocess(Image.open(image_path)).unsqueeze(0).to(device)
-        with torch.no_grad():
-            embedding = model.encode_image(image)
-            # Clear CUDA cache if using GPU
-            if device == "cuda":
-                torch.cuda.empty_cache()
-        return embedding.cpu().numpy().flatten()
+        image = _load_and_preprocess(image_path)
+        if image is None:
+            return None
+        with metrics.stage("clip.inference"):
+            embedding = encoder(image.unsqueeze(0))
+        # Clear CUDA cache if using GPU
+        if device == "cuda":
+            torch.cuda.empty_cache()
+        return embedding.flatten()
     except Exception as e:
         logging.error(f"Error processing image {image_path}: {e}")
         return None
 
 
-def process_image_batch(image_paths, batch_size=32):
-    """Process images in batches to prevent memory issues"""
-    embeddings = []
+def get_cached_embedding(image_path, store=None):
+    """Return the embedding for an image, encoding it only if the store has no
+    up-to-date vector for it"""
+    if store is None:
+        return get_image_embedding(image_path)
 
-    for i in range(0, len(image_paths), batch_size):
-        batch = image_paths[i : i + batch_size]
-        batch_embeddings = []
+    embedding = store.get(image_path)
+    if embedding is not None:
+        return embedding
 
-        for img_path in batch:
-            emb = get_image_embedding(img_path)
-            if emb is not None:
-                batch_embeddings.append(emb)
+    embedding = get_image_embedding(image_path)
+    if embedding is not None:
+        store.put(image_path, embedding)
+    return embedding
 
-        embeddings.extend(batch_embeddings)
 
-        # Clear CUDA cache after each batch if using GPU
-        if device == "cuda":
-            torch.cuda.empty_cache()
+def _load_and_preprocess(image_path):
+    """Decode an image and apply the CLIP preprocessing transform"""
+    try:
+        with Image.open(image_path) as image:
+            with metrics.stage("clip.decode"):
+                image.load()
+            metrics.add_bytes("clip.read", os.path.getsize(image_path))
+            with metrics.stage("clip.preprocess"):
+                return preprocess(image)
+    except Exception as e:
+        logging.error(f"Error processing image {image_path}: {e}")
+        return None
+
+
+def _default_num_workers():
+    return min(8, os.cpu_count() or 1)
+
+
+def iter_embedding_batches(image_paths, batch_size=32, num_workers=None):
+    """Yield ``(paths, embeddings)`` for each batch of images.
 
+    A thread pool decodes and preprocesses the next batch while the current
+    one runs through the image encoder as a single ``[B, 3, 224, 224]``
+    tensor. Images that fail to load get ``None`` in place of an embedding.
+    """
+    model, preprocess, device = load_model()
+    if model is None or preprocess is None:
+        logging.error("CLIP model not initialized")
+        return
+    import torch
+
+    image_paths = list(image_paths)
+    batches = [
+        image_paths[i : i + batch_size]
+        for i in range(0, len(image_paths), batch_size)
+    ]
+    if not batches:
+        return
+
+    with ThreadPoolExecutor(max_workers=num_workers or _default_num_workers()) as pool:
+        pending = [pool.submit(_load_and_preprocess, p) for p in batches[0]]
+
+        for batch_index, batch in enumerate(batches):
+            # Time spent here means decoding, not inference, is the bottleneck
+            with metrics.stage("clip.wait_decode"):
+                tensors = [future.result() for future in pending]
+
+            # Queue up decoding of the next batch before running inference
+            if batch_index + 1 < len(batches):
+                pending = [
+                    pool.submit(_load_and_preprocess, p)
+                    for p in batches[batch_index + 1]
+                ]
+
+            embeddings = [None] * len(batch)
+            valid = [i for i, t in enumerate(tensors) if t is not None]
+            if valid:
+                try:
+                    stacked = torch.stack([tensors[i] for i in valid])
+                    with metrics.stage("clip.inference"):
+                        encoded = encoder(stacked)
+                    metrics.count("clip.images", len(valid))
+                    for row, i in enumerate(valid):
+                        embeddings[i] = encoded[row]
+                except Exception as e:
+                    logging.error(f"Error encoding batch {batch_index}: {e}")
+
+            # Clear CUDA cache after each batch if using GPU
+            if device == "cuda":
+                torch.cuda.empty_cache()
+
+            yield batch, embeddings
+
+
+def process_image_batch(image_paths, batch_size=32, num_workers=None):
+    """Encode images in batches of ``batch_size``.
+
+    Returns a list aligned with ``image_paths``; entries are ``None`` for
+    images that could not be processed.
+    """
+    if not is_clip_available():
+        logging.error("CLIP model not initialized")
+        return [None] * len(image_paths)
+
+    embeddings = []
+    for _, batch_embeddings in iter_embedding_batches(
+        image_paths, batch_size=batch_size, num_workers=num_workers
+    ):
+        embeddings.extend(batch_embeddings)
     return embeddings
 
 
-def are_images_similar(img1, img2, threshold=0.9):
-    """Compare two images using perceptual hash"""
+def fill_embedding_store(
+    image_paths,
+    store,
+    batch_size=32,
+    num_workers=None,
+    progress=None,
+    cancelled=None,
+):
+    """Batch-encode every image the store has no up-to-date vector for.
+
+    ``progress(done, total)`` is called after each batch; encoding stops
+    early once ``cancelled()`` returns True. Returns the number of images
+    that were encoded.
+    """
+    missing = [p for p in image_paths if store.get(p) is None]
+    if not missing:
+        return 0
+
+    logging.info(f"Encoding {len(missing)} new or modified images")
+    encoded = 0
+    done = 0
+    batches = iter_embedding_batches(
+        missing, batch_size=batch_size, num_workers=num_workers
+    )
+    try:
+        for batch, embeddings in batches:
+            for image_path, embedding in zip(batch, embeddings):
+                if embedding is not None and store.put(image_path, embedding):
+                    encoded += 1
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(missing))
+            if cancelled is not None and cancelled():
+                break
+    finally:
+        batches.close()
+    return encoded
+
+
+def are_images_similar(img1, img2, threshold=0.9, store=None):
+    """Compare two images using CLIP embeddings, read from ``store`` when given"""
     try:
 
         # Try CLIP comparison
-        if model is not None:
-            emb1 = get_image_embedding(img1)
-            emb2 = get_image_embedding(img2)
+        if is_clip_available():
+            emb1 = get_cached_embedding(img1, store)
+            emb2 = get_cached_embedding(img2, store)
             if emb1 is not None and emb2 is not None:
                 similarity = np.dot(emb1, emb2) / (
                     np.linalg.norm(emb1) * np.linalg.norm(emb2)
@@ -90,27 +295,28 @@ def are_images_similar(img1, img2, threshold=0.9):
         return False
 
 
-def is_blurry(image_path, threshold=100):
+def is_blurry(image_path, threshold=BLUR_THRESHOLD):
     try:
-        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+        with metrics.stage("quality.decode"):
+            image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
         if image is None:
             logging.error(f"Failed to load image: {image_path}")
             return True
-        variance = cv2.Laplacian(image, cv2.CV_64F).var()
-        return variance < threshold
+        return laplacian_variance(image) < threshold
     except Exception as e:
         logging.error(f"Error checking blur for {image_path}: {e}")
         return True
 
 
-def detect_noise(image_path, threshold=500):
+def detect_noise(image_path, threshold=NOISE_THRESHOLD):
     try:
-        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+        with metrics.stage("quality.decode"):
+            image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
         if image is None:
             logging.error(f"Failed to load image: {image_path}")
             return True
 
-        noise = np.std(image)
+        noise = noise_level(image)
         logging.debug(f"Noise level for {image_path}: {noise}")
         return noise > threshold
     except Exception as e:
@@ -119,10 +325,19 @@ def detect_noise(image_path, threshold=500):
 
 
 def is_clip_available():
-    """Check if CLIP model is properly initialized"""
+    """Check if CLIP model is properly initialized, loading it if needed"""
+    model, preprocess, _ = load_model()
     return model is not None and preprocess is not None
 
 
+def get_encoder_info():
+    """``{"backend", "quantize"}`` of the loaded encoder, or None without CLIP"""
+    load_model()
+    if encoder is None:
+        return None
+    return {"backend": encoder.name, "quantize": bool(encoder.quantize)}
+
+
 def get_clip_status():
     """Get detailed status of CLIP model"""
     if not is_clip_available():
@@ -135,5 +350,55 @@ def get_clip_status():
     else:
         if device == "cuda":
             return "CLIP model ready (using GPU - best performance)"
+        elif encoder.name != "torch":
+            backend = describe_backend(encoder.name, encoder.quantize)
+            return f"CLIP model ready (using CPU with {backend})"
         else:
             return "CLIP model ready (using CPU - slower but functional)"
+
+
+def validate_encoder(image_paths, batch_size=32):
+    """Compare the selected encoder with fp32 PyTorch on the same images.
+
+    Returns ``{"images", "backend", "mean_cosine", "min_cosine",
+    "reference_seconds", "encoder_seconds"}``, or None if CLIP is
+    unavailable or no image could be read.
+    """
+    model, preprocess, device = load_model()
+    if model is None or preprocess is None:
+        logging.error("CLIP model not initialized")
+        return None
+    import torch
+
+    reference = TorchEncoder(model, device)
+    agreements = []
+    reference_seconds = 0.0
+    encoder_seconds = 0.0
+    image_paths = list(image_paths)
+    for i in range(0, len(image_paths), batch_size):
+        tensors = [_load_and_preprocess(p) for p in image_paths[i : i + batch_size]]
+        tensors = [t for t in tensors if t is not None]
+        if not tensors:
+            continue
+        stacked = torch.stack(tensors)
+
+        start = time.perf_counter()
+        expected = reference(stacked)
+        reference_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = encoder(stacked)
+        encoder_seconds += time.perf_counter() - start
+        agreements.append(cosine_agreement(expected, actual))
+
+    if not agreements:
+        return None
+    agreements = np.concatenate(agreements)
+    return {
+        "images": len(agreements),
+        "backend": describe_backend(encoder.name, encoder.quantize),
+        "mean_cosine": float(agreements.mean()),
+        "min_cosine": float(agreements.min()),
+        "reference_seconds": reference_seconds,
+        "encoder_seconds": encoder_seconds,
+    }
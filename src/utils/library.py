@@ -0,0 +1,96 @@
+import os
+import bisect
+import logging
+from pathlib import Path
+
+from . import events
+from .file_ops import EXCLUDED_FOLDERS, IMAGE_EXTENSIONS, scan_library
+
+
+class ImageLibrary:
+    """The images under a folder, shared by every view of it.
+
+    Walks the folder once, then keeps ``paths`` (sorted) and ``files``
+    (path to stat result) current from move and delete events published by
+    ``file_ops``, and from ``apply_changes`` for anything else, such as a
+    LibraryWatcher. Each change costs a dictionary update and a bisect, not
+    a walk. Listeners are called with ``(added {path: stat}, removed
+    [paths])`` for every effective change.
+    """
+
+    def __init__(self, folder, excluded=EXCLUDED_FOLDERS, num_workers=1):
+        self.folder = Path(folder)
+        self.excluded = excluded
+        self.files, self.directories = scan_library(folder, num_workers, excluded)
+        self.paths = list(self.files)
+        self.by_directory = {}
+        for path in self.paths:
+            self.by_directory.setdefault(str(path.parent), set()).add(path)
+        self.listeners = []
+        events.subscribe(events.FILE_MOVED, self.on_file_moved)
+        events.subscribe(events.FILE_DELETED, self.on_file_deleted)
+
+    def close(self):
+        events.unsubscribe(events.FILE_MOVED, self.on_file_moved)
+        events.unsubscribe(events.FILE_DELETED, self.on_file_deleted)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self.files
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def covers(self, path):
+        """True if ``path`` is an image this library would list"""
+        try:
+            parts = Path(path).relative_to(self.folder).parts
+        except ValueError:
+            return False
+        if not parts or (len(parts) > 1 and parts[0] in self.excluded):
+            return False
+        return os.path.splitext(parts[-1])[1].lower() in IMAGE_EXTENSIONS
+
+    def on_file_moved(self, source, destination):
+        added = {}
+        if self.covers(destination):
+            try:
+                added[destination] = os.stat(destination)
+            except OSError as e:
+                logging.error(f"Cannot stat {destination}: {e}")
+        self.apply_changes(added, [source])
+
+    def on_file_deleted(self, path):
+        self.apply_changes({}, [path])
+
+    def apply_changes(self, added, removed):
+        """Add and remove files, then tell the listeners what really changed.
+
+        Known paths in ``added`` only have their stat refreshed; unknown
+        paths in ``removed`` are ignored, so the same change reported twice
+        (by an event and by the watcher) is applied once.
+        """
+        removed = [path for path in removed if path in self.files]
+        for path in removed:
+            del self.files[path]
+            self.by_directory.get(str(path.parent), set()).discard(path)
+            i = bisect.bisect_left(self.paths, path)
+            del self.paths[i]
+
+        new = {}
+        for path, stat in added.items():
+            if path not in self.files:
+                new[path] = stat
+                bisect.insort(self.paths, path)
+                self.by_directory.setdefault(str(path.parent), set()).add(path)
+            self.files[path] = stat
+
+        if new or removed:
+            for callback in list(self.listeners):
+                callback(new, removed)
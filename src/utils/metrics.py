@@ -0,0 +1,228 @@
+"""Low-overhead per-stage timing, counters and memory for scans.
+
+Code under measurement wraps a stage in ``with metrics.stage("name"):``,
+which costs two ``perf_counter_ns`` calls and a short lock. Each stage
+keeps a count, a total and a histogram of power-of-two microsecond
+buckets, so percentiles come out of a fixed-size array however many
+samples there are. Counters and byte totals are plain sums.
+
+Worker processes call ``start_fresh()`` first, so a forked worker does not
+hand back the parent's numbers, then record into their own ``metrics``
+and return the raw numbers with ``take()``; the parent adds them in with
+``merge()``.
+
+Set ``IMAGE_MANAGER_METRICS=0`` to turn recording off.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Bucket i holds durations below 2**i microseconds; the last one is open
+BUCKETS = 32
+
+
+def peak_rss_bytes(children=False):
+    """Peak resident set size of this process (or its reaped children)"""
+    if resource is not None:
+        who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+        peak = resource.getrusage(who).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None and not children:
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss)
+    return None
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+_NOT_RECORDING = contextlib.nullcontext()
+
+
+class Metrics:
+    """Thread-safe stage timings, counters and byte totals"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def start_fresh(self):
+        """Drop everything, including a lock a fork may have copied held"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # name -> [count, total_ns, buckets]
+            self.stages = {}
+            self.counters = {}
+            self.bytes = {}
+
+    def stage(self, name):
+        """Context manager timing one pass through ``name``"""
+        if not self.enabled:
+            return _NOT_RECORDING
+        return _Stage(self, name)
+
+    def record(self, name, duration_ns):
+        bucket = min((duration_ns // 1000).bit_length(), BUCKETS - 1)
+        with self._lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [0, 0, [0] * BUCKETS]
+            stage[0] += 1
+            stage[1] += duration_ns
+            stage[2][bucket] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_bytes(self, name, n):
+        if self.enabled:
+            with self._lock:
+                self.bytes[name] = self.bytes.get(name, 0) + n
+
+    def snapshot(self):
+        """Raw copy of everything recorded so far"""
+        with self._lock:
+            return {
+                "stages": {
+                    name: [count, total, list(buckets)]
+                    for name, (count, total, buckets) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "bytes": dict(self.bytes),
+            }
+
+    def take(self):
+        """Return the raw numbers and start over; used by worker processes"""
+        raw = self.snapshot()
+        self.reset()
+        return raw
+
+    def merge(self, raw):
+        """Add in numbers from ``take()`` in another process"""
+        with self._lock:
+            for name, (count, total, buckets) in raw["stages"].items():
+                stage = self.stages.get(name)
+                if stage is None:
+                    stage = self.stages[name] = [0, 0, [0] * BUCKETS]
+                stage[0] += count
+                stage[1] += total
+                stage[2] = [a + b for a, b in zip(stage[2], buckets)]
+            for name, n in raw["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+            for name, n in raw["bytes"].items():
+                self.bytes[name] = self.bytes.get(name, 0) + n
+
+    def report(self, since=None):
+        """Summary as a JSON-ready dict.
+
+        ``since`` is an earlier ``snapshot()``; only what was recorded after
+        it is reported. Percentiles are upper bounds of histogram buckets,
+        so they are accurate to a factor of two.
+        """
+        raw = self.snapshot()
+        if since is not None:
+            raw = _subtract(raw, since)
+
+        stages = {}
+        for name, (count, total, buckets) in sorted(raw["stages"].items()):
+            if count:
+                stages[name] = {
+                    "count": count,
+                    "total_s": total / 1e9,
+                    "mean_ms": total / count / 1e6,
+                    "p50_ms": _percentile(buckets, count, 0.5),
+                    "p90_ms": _percentile(buckets, count, 0.9),
+                    "p99_ms": _percentile(buckets, count, 0.99),
+                    "max_ms": _percentile(buckets, count, 1.0),
+                    "histogram_us": {
+                        f"<{2 ** i}": n for i, n in enumerate(buckets) if n
+                    },
+                }
+        return {
+            "stages": stages,
+            "counters": {k: v for k, v in sorted(raw["counters"].items()) if v},
+            "bytes": {k: v for k, v in sorted(raw["bytes"].items()) if v},
+            "peak_rss_bytes": peak_rss_bytes(),
+            "peak_rss_workers_bytes": peak_rss_bytes(children=True),
+        }
+
+    def save_report(self, path, since=None, **extra):
+        """Write ``report(since)`` plus ``extra`` fields to ``path``"""
+        try:
+            report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), **extra}
+            report.update(self.report(since))
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to save metrics report {path}: {e}")
+            return False
+
+
+def _subtract(raw, since):
+    stages = {}
+    for name, (count, total, buckets) in raw["stages"].items():
+        before = since["stages"].get(name)
+        if before is not None:
+            count -= before[0]
+            total -= before[1]
+            buckets = [a - b for a, b in zip(buckets, before[2])]
+        stages[name] = [count, total, buckets]
+    return {
+        "stages": stages,
+        "counters": {
+            k: v - since["counters"].get(k, 0) for k, v in raw["counters"].items()
+        },
+        "bytes": {k: v - since["bytes"].get(k, 0) for k, v in raw["bytes"].items()},
+    }
+
+
+def _percentile(buckets, count, fraction):
+    """Upper bound, in milliseconds, of the bucket holding ``fraction``"""
+    target = max(1, fraction * count)
+    seen = 0
+    for i, n in enumerate(buckets):
+        seen += n
+        if seen >= target:
+            return 2**i / 1000
+    return 2 ** (len(buckets) - 1) / 1000
+
+
+metrics = Metrics(enabled=os.environ.get("IMAGE_MANAGER_METRICS", "1") != "0")
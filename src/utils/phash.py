@@ -0,0 +1,122 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import imagehash
+from PIL import Image
+
+from .metrics import metrics
+
+HASH_BITS = 64
+# Images hashed between progress reports and cancellation checks
+HASH_CHUNK = 256
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values):
+    """Number of set bits in each element of a uint64 array"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def compute_hash(image_path):
+    """64-bit difference hash of an image, or None if it cannot be read"""
+    try:
+        with metrics.stage("hash.image"), Image.open(image_path) as image:
+            # JPEGs can be decoded at a fraction of their size for hashing
+            image.draft("L", (256, 256))
+            return int(str(imagehash.dhash(image)), 16)
+    except Exception as e:
+        logging.error(f"Error hashing image {image_path}: {e}")
+        return None
+
+
+def compute_hashes(
+    image_paths, catalog=None, num_workers=None, progress=None, cancelled=None
+):
+    """Hash every image, reusing hashes stored in the catalog.
+
+    The catalog drops a file's hash when the file changes, so only new or
+    modified images are decoded. Returns ``(hashes, valid)``: a uint64 array
+    aligned with ``image_paths`` and a boolean mask of the images that could
+    be hashed.
+
+    ``progress(done, total)`` is called after each chunk of images; hashing
+    stops early once ``cancelled()`` returns True, keeping what was done.
+    """
+    results = catalog.load_hashes() if catalog is not None else {}
+    missing = [Path(p) for p in image_paths if Path(p) not in results]
+
+    if missing:
+        logging.info(f"Hashing {len(missing)} new or modified images")
+        computed = {}
+        with ThreadPoolExecutor(max_workers=num_workers or os.cpu_count()) as pool:
+            for start in range(0, len(missing), HASH_CHUNK):
+                chunk = missing[start : start + HASH_CHUNK]
+                for image_path, value in zip(chunk, pool.map(compute_hash, chunk)):
+                    if value is not None:
+                        computed[image_path] = value
+                if progress is not None:
+                    progress(start + len(chunk), len(missing))
+                if cancelled is not None and cancelled():
+                    break
+        metrics.count("hash.computed", len(computed))
+        results.update(computed)
+        if catalog is not None:
+            catalog.save_hashes(computed)
+
+    hashes = np.zeros(len(image_paths), dtype=np.uint64)
+    valid = np.zeros(len(image_paths), dtype=bool)
+    for i, image_path in enumerate(image_paths):
+        value = results.get(Path(image_path))
+        if value is not None:
+            hashes[i] = value
+            valid[i] = True
+    return hashes, valid
+
+
+def _substrings(max_distance):
+    """Split the hash into ``max_distance + 1`` bit ranges ``(shift, width)``"""
+    bounds = np.linspace(0, HASH_BITS, max_distance + 2).astype(int)
+    return [(int(lo), int(hi - lo)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def find_near_duplicates(hashes, max_distance=4, valid=None):
+    """Find pairs of hashes at most ``max_distance`` bits apart.
+
+    Uses multi-index hashing: with the hash split into ``max_distance + 1``
+    substrings, any two hashes within that distance agree exactly on at
+    least one of them. Only images sharing a substring bucket are compared,
+    with a vectorized popcount over the packed hashes.
+
+    Returns ``(i, j, distance)`` tuples with ``i < j``.
+    """
+    ids = np.flatnonzero(valid) if valid is not None else np.arange(len(hashes))
+    packed = np.asarray(hashes, dtype=np.uint64)[ids]
+    seen = set()
+    pairs = []
+
+    for shift, width in _substrings(max_distance):
+        keys = (packed >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        order = np.argsort(keys, kind="stable")
+        boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+
+        for bucket in np.split(order, boundaries):
+            if len(bucket) < 2:
+                continue
+            bucket_hashes = packed[bucket]
+            for a in range(len(bucket) - 1):
+                distances = popcount64(bucket_hashes[a] ^ bucket_hashes[a + 1 :])
+                for b in np.flatnonzero(distances <= max_distance):
+                    i, j = sorted((int(ids[bucket[a]]), int(ids[bucket[a + 1 + b]])))
+                    if (i, j) not in seen:
+                        seen.add((i, j))
+                        pairs.append((i, j, int(distances[b])))
+
+    logging.info(
+        f"Found {len(pairs)} near-duplicate pairs within {max_distance} bits"
+    )
+    return pairs
@@ -0,0 +1,143 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from .metrics import metrics
+
+# Kept free of torch/CLIP imports: this module is loaded by every worker
+# process of the quality scan pool.
+
+BLUR_THRESHOLD = 100
+NOISE_THRESHOLD = 500
+
+# JPEGs are scaled down inside libjpeg while decoding; other formats are
+# decoded in full and then resized by OpenCV
+DECODE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def laplacian_variance(image):
+    """Variance of the Laplacian; low values mean few sharp edges"""
+    return float(cv2.Laplacian(image, cv2.CV_64F).var())
+
+
+def noise_level(image):
+    return float(np.std(image))
+
+
+def analyze_image_quality(image_path, scale=1):
+    """Return ``(laplacian_variance, noise)`` from a single grayscale decode.
+
+    ``scale`` (1, 2, 4 or 8) decodes at that fraction of full resolution.
+    Returns None if the image cannot be read.
+    """
+    try:
+        with metrics.stage("quality.decode"):
+            image = cv2.imread(str(image_path), DECODE_FLAGS[scale])
+        if image is None:
+            logging.error(f"Failed to load image: {image_path}")
+            return None
+        metrics.add_bytes("quality.decoded", image.nbytes)
+        with metrics.stage("quality.analyze"):
+            return laplacian_variance(image), noise_level(image)
+    except Exception as e:
+        logging.error(f"Error analyzing {image_path}: {e}")
+        return None
+
+
+def is_bad_quality(
+    scores, blur_threshold=BLUR_THRESHOLD, noise_threshold=NOISE_THRESHOLD
+):
+    """Unreadable, blurry or noisy images are all treated as bad"""
+    if scores is None:
+        return True
+    variance, noise = scores
+    return variance < blur_threshold or noise > noise_threshold
+
+
+def _init_worker():
+    # One OpenCV thread per process; the pool already uses every core
+    cv2.setNumThreads(1)
+    # A forked worker starts with a copy of the parent's numbers, which
+    # would be merged back once per worker
+    metrics.start_fresh()
+
+
+def _analyze_chunk(image_paths, scale=1):
+    """Scores for a chunk, plus the metrics this worker recorded for it"""
+    return [analyze_image_quality(p, scale) for p in image_paths], metrics.take()
+
+
+def calibrate_blur_scale(image_paths, scale, sample_size=50, seed=0):
+    """Estimate how much reduced-scale decoding inflates the Laplacian variance.
+
+    Downscaling packs the same edges into fewer pixels, so variances come out
+    higher than at full resolution. Returns the median ratio of reduced to
+    full-resolution variance over a random sample; dividing reduced-scale
+    variances by it keeps them comparable with ``BLUR_THRESHOLD``.
+    """
+    if scale == 1:
+        return 1.0
+    image_paths = list(image_paths)
+    rng = np.random.default_rng(seed)
+    sample = rng.permutation(len(image_paths))[:sample_size]
+
+    ratios = []
+    for i in sample:
+        full = analyze_image_quality(image_paths[i])
+        reduced = analyze_image_quality(image_paths[i], scale)
+        if full is not None and reduced is not None and full[0] > 0:
+            ratios.append(reduced[0] / full[0])
+
+    if not ratios:
+        logging.warning(f"Could not calibrate blur scale {scale}, using 1.0")
+        return 1.0
+    factor = float(np.median(ratios))
+    logging.info(f"Blur variance at 1/{scale} scale is {factor:.2f}x full resolution")
+    return factor
+
+
+def iter_quality_scores(image_paths, num_workers=None, chunk_size=16, scale=1):
+    """Yield ``(path, scores)`` for every image, in input order.
+
+    Images are analyzed in chunks on a process pool sized to the available
+    cores. Only a few chunks per worker are in flight at a time, so closing
+    the generator early stops the scan without waiting for the whole list.
+    """
+    image_paths = list(image_paths)
+    num_workers = num_workers or os.cpu_count() or 1
+    chunks = [
+        image_paths[i : i + chunk_size]
+        for i in range(0, len(image_paths), chunk_size)
+    ]
+    if not chunks:
+        return
+
+    pool = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker)
+    try:
+        pending = deque()
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < num_workers * 4:
+                chunk = chunks[next_chunk]
+                pending.append((chunk, pool.submit(_analyze_chunk, chunk, scale)))
+                next_chunk += 1
+
+            chunk, future = pending.popleft()
+            with metrics.stage("quality.wait"):
+                results, worker_metrics = future.result()
+            metrics.merge(worker_metrics)
+            for image_path, scores in zip(chunk, results):
+                yield image_path, scores
+    finally:
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
@@ -0,0 +1,403 @@
+"""Scan engines shared by the GUI tabs.
+
+These functions do not touch Qt. Progress, partial results and cancellation
+go through plain callbacks:
+
+- ``progress(done, total, message)``
+- ``partial(items)`` with results that are already final
+- ``cancelled()`` returns True once the caller wants the scan to stop
+
+A cancelled scan returns None. Each scan writes the stage timings it
+recorded to ``.cache/metrics/<scan>.json`` (see ``metrics``).
+"""
+
+import logging
+from pathlib import Path
+
+from .cache import get_cache_dir, get_relative_key
+from .catalog import Catalog
+from .embedding_store import EmbeddingStore
+from .image_processing import fill_embedding_store, get_encoder_info
+from .metrics import metrics
+from .quality import iter_quality_scores, calibrate_blur_scale
+from .thumbnails import get_thumbnail_cache
+from .similarity import normalize_embeddings, iter_similar_pairs
+from .grouping import group_edges, expand_groups, distance_edges
+from .phash import HASH_BITS, compute_hashes, find_near_duplicates
+from .ann_index import (
+    get_embedding_key,
+    load_or_build_index,
+    knn_pairs,
+    measure_recall,
+)
+
+SIMILARITY_THRESHOLD = 0.91
+# Libraries at least this large use approximate nearest-neighbour search
+ANN_MIN_IMAGES = 20000
+ANN_NEIGHBOURS = 32
+# Maximum dHash distance, in bits, for two images to count as duplicates
+HASH_DISTANCE = 4
+# Quality scores are sent to the GUI in batches of this many images
+PARTIAL_BATCH_SIZE = 256
+
+
+def _noop(*args):
+    return None
+
+
+def _never():
+    return False
+
+
+def _save_metrics(image_folder, scan, since):
+    """Write what ``scan`` recorded to ``.cache/metrics/<scan>.json``"""
+    directory = get_cache_dir(image_folder) / "metrics"
+    directory.mkdir(exist_ok=True)
+    path = directory / f"{scan}.json"
+    if metrics.save_report(path, since=since, scan=scan, folder=str(image_folder)):
+        logging.info(f"Metrics for {scan} written to {path}")
+
+
+def _find_pairs_exact(embeddings, indices, threshold, progress, cancelled):
+    """Compare every pair of embeddings with blocked matrix products"""
+    pairs = []
+
+    def report_progress(rows_done, total_rows):
+        progress(
+            rows_done,
+            total_rows,
+            f"Comparing images {rows_done} of {total_rows}\n"
+            f"Similar pairs found: {len(pairs)}",
+        )
+
+    for i, j, score in iter_similar_pairs(
+        embeddings, threshold, progress=report_progress
+    ):
+        if cancelled():
+            return None
+        pairs.append((indices[i], indices[j], score))
+    return pairs
+
+
+def _find_pairs_ann(
+    image_folder, image_files, embeddings, indices, threshold, progress, cancelled
+):
+    """Find similar pairs among each image's approximate nearest neighbours.
+
+    Returns ``(pairs, recall)`` where recall is measured against exact
+    search on a random sample.
+    """
+    progress(0, 0, f"Building search index for {len(indices)} images...")
+    key = get_embedding_key(
+        (get_relative_key(image_folder, image_files[i]) for i in indices), embeddings
+    )
+    index = load_or_build_index(image_folder, embeddings, key)
+
+    def report_progress(done, total):
+        progress(done, total, f"Searching neighbours {done} of {total}")
+
+    k = min(ANN_NEIGHBOURS + 1, len(indices))
+    labels, scores = index.self_join(embeddings, k, progress=report_progress)
+    if cancelled():
+        return None, None
+
+    recall = measure_recall(embeddings, labels)
+    pairs = [
+        (indices[i], indices[j], score)
+        for i, j, score in knn_pairs(labels, scores, threshold)
+    ]
+    logging.info(
+        f"{index.name} search found {len(pairs)} pairs (recall@{k} {recall:.3f})"
+    )
+    return pairs, recall
+
+
+def scan_similar(
+    image_folder,
+    image_files,
+    threshold=SIMILARITY_THRESHOLD,
+    search_mode="auto",
+    grouping="connected",
+    stats=None,
+    progress=None,
+    partial=None,
+    cancelled=None,
+):
+    """Find groups of similar images and store them in the catalog.
+
+    Embeddings and hashes are cached per file, so only added or changed
+    images are decoded; the comparison itself always covers the whole
+    library, which is cheap next to encoding.
+    Near-duplicates are settled by perceptual hash first and reported through
+    ``partial``; one image per duplicate set then goes on to CLIP.
+    ``stats`` may carry the stat results from ``scan_image_files``.
+
+    Returns ``{"groups": number of groups, "ann_recall": float or None}``.
+    """
+    progress = progress or _noop
+    partial = partial or _noop
+    cancelled = cancelled or _never
+    image_folder = Path(image_folder)
+    image_files = list(image_files)
+    n = len(image_files)
+    logging.info(f"Starting similar image scan of {n} images")
+    since = metrics.snapshot()
+
+    catalog = Catalog(image_folder)
+    # Vectors for unchanged files are read back instead of re-encoded
+    store = EmbeddingStore(image_folder, encoder=get_encoder_info())
+    store.prune(image_files)
+
+    try:
+        with metrics.stage("scan_similar.sync"):
+            catalog.sync_files(image_files, stats)
+
+        def report_hashing(done, total):
+            progress(done, total, f"Hashing new or modified images {done} of {total}")
+
+        progress(0, 0, "Hashing images...")
+        with metrics.stage("scan_similar.hash"):
+            hashes, valid = compute_hashes(
+                image_files, catalog, progress=report_hashing, cancelled=cancelled
+            )
+        if cancelled():
+            return None
+        with metrics.stage("scan_similar.duplicates"):
+            duplicate_groups = group_edges(
+                n,
+                distance_edges(
+                    find_near_duplicates(hashes, HASH_DISTANCE, valid), HASH_BITS
+                ),
+                method=grouping,
+            )
+        if duplicate_groups:
+            partial([[image_files[i] for i in group] for group in duplicate_groups])
+        if cancelled():
+            return None
+
+        duplicates = {i for group in duplicate_groups for i in group[1:]}
+        remainder = [i for i in range(n) if i not in duplicates]
+        remainder_files = [image_files[i] for i in remainder]
+
+        def report_encoding(done, total):
+            progress(
+                done,
+                total,
+                f"Found {len(duplicates)} near-duplicates\n"
+                f"Encoding new or modified images {done} of {total}",
+            )
+
+        progress(0, 0, f"Found {len(duplicates)} near-duplicates")
+        with metrics.stage("scan_similar.encode"):
+            fill_embedding_store(
+                remainder_files, store, progress=report_encoding, cancelled=cancelled
+            )
+            store.save()
+        if cancelled():
+            return None
+
+        # Each remaining image is embedded exactly once
+        embeddings, indices = store.stack(remainder_files)
+        embeddings = normalize_embeddings(embeddings)
+        indices = [remainder[i] for i in indices]
+
+        use_ann = len(indices) > 1 and (
+            search_mode == "ann"
+            or (search_mode == "auto" and len(indices) >= ANN_MIN_IMAGES)
+        )
+        recall = None
+        with metrics.stage("scan_similar.compare"):
+            if use_ann:
+                pairs, recall = _find_pairs_ann(
+                    image_folder,
+                    image_files,
+                    embeddings,
+                    indices,
+                    threshold,
+                    progress,
+                    cancelled,
+                )
+            else:
+                pairs = _find_pairs_exact(
+                    embeddings, indices, threshold, progress, cancelled
+                )
+        if pairs is None:
+            logging.info("Similar scan cancelled")
+            return None
+
+        with metrics.stage("scan_similar.group"):
+            groups = expand_groups(
+                group_edges(n, pairs, method=grouping), duplicate_groups
+            )
+            catalog.save_similar_groups(
+                [[image_files[i] for i in group] for group in groups]
+            )
+        logging.info(f"Scan complete. Found {len(groups)} groups")
+        return {"groups": len(groups), "ann_recall": recall}
+    finally:
+        store.save()
+        catalog.close()
+        _save_metrics(image_folder, "scan_similar", since)
+
+
+def scan_blurry(
+    image_folder,
+    image_files,
+    num_workers=None,
+    scale=1,
+    incremental=True,
+    stats=None,
+    progress=None,
+    partial=None,
+    cancelled=None,
+):
+    """Score images for blur and noise and store the scores in the catalog.
+
+    With ``incremental`` set, only files that were added or changed since
+    they were last scored are decoded. Each image is decoded once for both
+    metrics, on a process pool. With ``scale`` > 1 images are decoded at
+    reduced resolution and the Laplacian variances are rescaled to
+    full-resolution units, using a factor calibrated on the first scan at
+    that scale and kept in the catalog. ``stats`` may carry the stat
+    results from ``scan_image_files``.
+
+    Scores are written in batches, each one also sent through ``partial``,
+    so a cancelled scan keeps what it finished. Returns
+    ``{"scanned": images decoded, "total": images in the library}``.
+    """
+    progress = progress or _noop
+    partial = partial or _noop
+    cancelled = cancelled or _never
+    image_folder = Path(image_folder)
+    since = metrics.snapshot()
+
+    catalog = Catalog(image_folder)
+    try:
+        with metrics.stage("scan_blurry.sync"):
+            catalog.sync_files(image_files, stats)
+        if not incremental:
+            catalog.clear_quality()
+        to_scan = catalog.paths_missing_quality(scale)
+
+        total_images = len(to_scan)
+        logging.info(f"Starting blurry image scan of {total_images} images")
+
+        # Calibrated once per library and scale, so scores from different
+        # runs share the same units
+        blur_factor = 1.0
+        if scale > 1 and to_scan:
+            blur_factor = catalog.load_blur_factor(scale)
+            if blur_factor is None:
+                progress(0, 0, f"Calibrating blur threshold for 1/{scale} scale...")
+                blur_factor = calibrate_blur_scale(to_scan, scale)
+                # 1.0 means calibration failed; try again next scan
+                if blur_factor != 1.0:
+                    catalog.save_blur_factor(scale, blur_factor)
+
+        batch = {}
+        scores = iter_quality_scores(to_scan, num_workers=num_workers, scale=scale)
+        try:
+            for i, (img_path, image_scores) in enumerate(scores):
+                if cancelled():
+                    logging.info("Blurry scan cancelled")
+                    return None
+
+                if image_scores is not None:
+                    variance, noise = image_scores
+                    image_scores = (variance / blur_factor, noise)
+                batch[img_path] = image_scores
+
+                if len(batch) >= PARTIAL_BATCH_SIZE:
+                    with metrics.stage("scan_blurry.save"):
+                        catalog.save_quality(batch, scale)
+                    partial(batch)
+                    batch = {}
+                progress(
+                    i + 1, total_images, f"Scanning image {i+1} of {total_images}"
+                )
+        finally:
+            scores.close()
+            if batch:
+                catalog.save_quality(batch, scale)
+                partial(batch)
+
+        return {"scanned": total_images, "total": catalog.count_files()}
+    finally:
+        catalog.close()
+        _save_metrics(image_folder, "scan_blurry", since)
+
+
+def index_library(
+    image_folder,
+    image_files,
+    thumbnails=False,
+    stats=None,
+    progress=None,
+    cancelled=None,
+):
+    """Precompute the per-image data scans and views reuse.
+
+    Fills the catalog's perceptual hashes and the embedding store, and with
+    ``thumbnails`` set also the on-disk thumbnail tiles, for every image
+    that was added or changed. A later similar scan then only compares.
+
+    Returns ``{"images", "encoded", "thumbnails"}`` counts.
+    """
+    progress = progress or _noop
+    cancelled = cancelled or _never
+    image_folder = Path(image_folder)
+    image_files = list(image_files)
+    stats = stats or {}
+    since = metrics.snapshot()
+
+    catalog = Catalog(image_folder)
+    store = EmbeddingStore(image_folder, encoder=get_encoder_info())
+    store.prune(image_files)
+    try:
+        with metrics.stage("index.sync"):
+            catalog.sync_files(image_files, stats)
+
+        def report_hashing(done, total):
+            progress(done, total, f"Hashing images {done} of {total}")
+
+        progress(0, 0, "Hashing images...")
+        with metrics.stage("index.hash"):
+            compute_hashes(
+                image_files, catalog, progress=report_hashing, cancelled=cancelled
+            )
+        if cancelled():
+            return None
+
+        def report_encoding(done, total):
+            progress(done, total, f"Encoding images {done} of {total}")
+
+        with metrics.stage("index.encode"):
+            encoded = fill_embedding_store(
+                image_files, store, progress=report_encoding, cancelled=cancelled
+            )
+            store.save()
+        if cancelled():
+            return None
+
+        tiles = 0
+        if thumbnails:
+            cache = get_thumbnail_cache(image_folder)
+            for i, image_path in enumerate(image_files):
+                if cancelled():
+                    return None
+                with metrics.stage("index.thumbnail"):
+                    tile = cache.get(image_path, stats.get(image_path))
+                if tile is not None:
+                    tiles += 1
+                progress(
+                    i + 1,
+                    len(image_files),
+                    f"Creating thumbnails {i + 1} of {len(image_files)}",
+                )
+
+        logging.info(f"Indexed {len(image_files)} images, encoded {encoded}")
+        return {"images": len(image_files), "encoded": encoded, "thumbnails": tiles}
+    finally:
+        store.save()
+        catalog.close()
+        _save_metrics(image_folder, "index", since)
@@ -0,0 +1,48 @@
+import logging
+
+import numpy as np
+
+
+def normalize_embeddings(embeddings):
+    """L2-normalize embedding rows so dot products are cosine similarities"""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def iter_similar_pairs(embeddings, threshold=0.91, block_size=1024, progress=None):
+    """Yield ``(i, j, score)`` for every pair with cosine similarity >= threshold.
+
+    ``embeddings`` must already be L2-normalized. Similarities are computed
+    tile by tile over the upper triangle, so memory stays at
+    ``block_size x block_size`` floats no matter how many images there are.
+    ``progress(rows_done, total_rows)`` is called after each row block.
+    """
+    n = len(embeddings)
+    for row_start in range(0, n, block_size):
+        row_stop = min(row_start + block_size, n)
+        row_block = embeddings[row_start:row_stop]
+
+        for col_start in range(row_start, n, block_size):
+            col_stop = min(col_start + block_size, n)
+            scores = row_block @ embeddings[col_start:col_stop].T
+
+            if col_start == row_start:
+                # Diagonal tile: keep only j > i
+                scores = np.triu(scores, k=1)
+            rows, cols = np.nonzero(scores >= threshold)
+
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                yield row_start + r, col_start + c, float(scores[r, c])
+
+        if progress is not None:
+            progress(row_stop, n)
+
+
+def find_similar_pairs(embeddings, threshold=0.91, block_size=1024):
+    """Return all similar pairs as a list of ``(i, j, score)`` tuples"""
+    normalized = normalize_embeddings(embeddings)
+    pairs = list(iter_similar_pairs(normalized, threshold, block_size))
+    logging.info(f"Found {len(pairs)} pairs above similarity {threshold}")
+    return pairs
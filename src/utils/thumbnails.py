@@ -0,0 +1,152 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from .cache import get_cache_dir
+
+# Image area of a ClickableImageLabel: a 250x250 cell minus the button row
+# and margins
+THUMBNAIL_SIZE = (240, 210)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """Pre-scaled tiles on disk under ``.cache/thumbnails``.
+
+    Tiles are keyed by the source file's path, size and mtime, so an edited
+    image gets a fresh tile. The total size is capped at ``max_bytes``; the
+    least recently used tiles are evicted first, with recency persisted
+    through each tile's mtime.
+    """
+
+    def __init__(
+        self,
+        folder_path,
+        max_bytes=DEFAULT_MAX_BYTES,
+        size=THUMBNAIL_SIZE,
+        image_format="JPEG",
+    ):
+        self.directory = get_cache_dir(folder_path) / "thumbnails"
+        self.directory.mkdir(exist_ok=True)
+        self.max_bytes = max_bytes
+        self.size = size
+        self.image_format = image_format
+        self.extension = ".webp" if image_format == "WEBP" else ".jpg"
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_entries()
+
+    def _load_entries(self):
+        """Index existing tiles, oldest first"""
+        tiles = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.extension):
+                    stat = entry.stat()
+                    tiles.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        for _, name, size in sorted(tiles):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    def _tile_name(self, image_path, stat):
+        key = (
+            f"{Path(image_path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}|"
+            f"{self.size[0]}x{self.size[1]}"
+        )
+        return hashlib.sha1(key.encode()).hexdigest() + self.extension
+
+    def get(self, image_path, stat=None):
+        """Return the tile path for an image, creating it if needed.
+
+        Returns None if the image cannot be read.
+        """
+        try:
+            if stat is None:
+                stat = os.stat(image_path)
+            name = self._tile_name(image_path, stat)
+        except OSError as e:
+            logging.error(f"Cannot stat {image_path}: {e}")
+            return None
+        tile_path = self.directory / name
+
+        with self._lock:
+            if name in self.entries:
+                self.entries.move_to_end(name)
+                try:
+                    os.utime(tile_path)
+                    return tile_path
+                except OSError:
+                    # Removed behind our back; fall through and regenerate
+                    self.total_bytes -= self.entries.pop(name)
+
+        if not self._create(image_path, tile_path):
+            return None
+
+        with self._lock:
+            if name not in self.entries:
+                size = tile_path.stat().st_size
+                self.entries[name] = size
+                self.total_bytes += size
+                self._evict()
+        return tile_path
+
+    def _create(self, image_path, tile_path):
+        try:
+            with Image.open(image_path) as image:
+                # JPEGs can be decoded straight at a fraction of full size
+                image.draft("RGB", self.size)
+                image = image.convert("RGB")
+                image.thumbnail(self.size, Image.LANCZOS)
+                tmp_path = tile_path.with_name(
+                    f"{tile_path.stem}.{threading.get_ident()}.tmp"
+                )
+                image.save(tmp_path, self.image_format, quality=85)
+            os.replace(tmp_path, tile_path)
+            return True
+        except Exception as e:
+            logging.error(f"Error creating thumbnail for {image_path}: {e}")
+            return False
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                pass
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+_max_bytes = DEFAULT_MAX_BYTES
+
+
+def set_thumbnail_cache_max_bytes(max_bytes):
+    """Size cap for every shared ThumbnailCache, open or opened later"""
+    global _max_bytes
+    with _caches_lock:
+        _max_bytes = max_bytes
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.set_max_bytes(max_bytes)
+
+
+def get_thumbnail_cache(folder_path):
+    """Shared ThumbnailCache for a library folder"""
+    key = str(Path(folder_path).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ThumbnailCache(folder_path, max_bytes=_max_bytes)
+        return _caches[key]
@@ -0,0 +1,16 @@
+from src.utils.grouping import distance_edges, group_edges
+
+
+def test_complete_grouping_merges_closest_hashes_first():
+    # A-B are 4 bits apart, B-C are exact duplicates
+    edges = [(0, 1, 4), (1, 2, 0)]
+
+    groups = group_edges(3, distance_edges(edges, 64), method="complete")
+
+    assert groups == [[1, 2]]
+
+
+def test_connected_grouping_ignores_distance_order():
+    edges = [(0, 1, 4), (1, 2, 0)]
+
+    assert group_edges(3, distance_edges(edges, 64)) == [[0, 1, 2]]
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from src.utils.library import ImageLibrary
+
+
+def make_library_tree(root):
+    (root / "set_002" / "deep").mkdir(parents=True)
+    for name in ("a.jpg", "set_002/b.jpg", "set_002/deep/c.png"):
+        (root / name).write_bytes(b"")
+
+
+@pytest.fixture
+def relative_root(tmp_path, monkeypatch):
+    make_library_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return "."
+
+
+def test_directory_keys_match_under_relative_root(relative_root):
+    library = ImageLibrary(relative_root)
+    try:
+        assert set(library.by_directory) <= set(library.directories)
+        assert "set_002" in library.directories
+    finally:
+        library.close()
+
+
+def test_watcher_drops_file_deleted_in_subdirectory(relative_root):
+    QtCore = pytest.importorskip("PyQt5.QtCore")
+    from src.ui.library_watcher import LibraryWatcher
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    library = ImageLibrary(relative_root)
+    watcher = LibraryWatcher(library, polling=True)
+    changes = []
+    library.add_listener(lambda added, removed: changes.append(removed))
+    try:
+        deleted = os.path.join("set_002", "b.jpg")
+        os.remove(deleted)
+        # Force a different mtime in case the delete landed in the same tick
+        stat = os.stat("set_002")
+        os.utime("set_002", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        watcher.check_now()
+
+        assert all(str(path) != deleted for path in library.paths)
+        assert [str(path) for path in changes[-1]] == [deleted]
+    finally:
+        watcher.stop()
+        library.close()
+        del app